@@ -1,18 +1,234 @@
 import streamlit as st
 import os
+import json
+import shutil
 from pathlib import Path
 import datetime
+import time
 import pandas as pd
 
 from B00_login import login
 from B10_select_project_id import project_id
 from B11_sensors_list import get_sensors, get_list_of_sensor_types, choose_sensor_types, get_dict_of_id_sensors
-from B12_sensor_informations import derivedDatapoints_list, select_derived_datapoints, extract_data, create_dataframes_by_type
-from B20_assets import get_assets, get_dict_of_id_assets, extract_asset, create_dataframes_by_type as create_assets_df
-from B30_excel_file import export_dict_of_dfs_to_excel
+from B12_sensor_informations import derivedDatapoints_list, select_derived_datapoints, extract_data, create_dataframes_by_type, plan_series
+from B13_timeseries_cache import TimeseriesCache
+from B17_catalog import CatalogCache, expire_catalogs
+from B16_latest_values import sensor_snapshot, SNAPSHOT_SHEET
+from Z03_resampling import AGGREGATIONS, DEFAULT_AGGREGATION
+from B20_assets import get_assets, get_dict_of_id_assets, get_asset_datapoint_codes, extract_asset, DEFAULT_ASSET_DATAPOINTS, create_dataframes_by_type as create_assets_df
+from B31_exporters import EXPORT_FORMATS, DEFAULT_EXPORT_FORMAT, available_formats, export_frames
+from Z04_instrumentation import RunMetrics
+from config_handler import EXPORT_DIR
 from PIL import Image
 
+# --- CACHE ---
+# Durées de validité (en secondes) des résultats mis en cache entre deux interactions
+LOGIN_TTL = 12 * 3600    # le jeton d'accès est renouvelé automatiquement (B00_login.AuthManager)
+CATALOG_TTL = 3600       # liste des capteurs, assets et données dérivées
+DATA_TTL = 900           # séries temporelles extraites
+SNAPSHOT_TTL = 60        # dernières valeurs (état actuel du site)
+
+# Instant du dernier rafraîchissement demandé par la session (0 : jamais), passé aux fonctions
+# en cache pour que ses entrées ne soient pas partagées avec les sessions qui n'ont pas rafraîchi
+REFRESH_KEY = 'refreshed_at'
+
+
+@st.cache_resource(ttl=LOGIN_TTL, show_spinner="Connexion...")
+def cached_login(email, password):
+    return login(email, password)
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner="Récupération des capteurs...")
+def cached_sensors(project_id, account, refreshed_at, _client):
+    # Catalogue local : lu sur disque s'il est récent, revalidé auprès de l'API sinon
+    return get_sensors(project_id, _client, catalog=CatalogCache(project_id))
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner="Récupération des données dérivées...")
+def cached_datapoints(project_id, account, grouped_sensors, refreshed_at, _client, _sensors):
+    return derivedDatapoints_list(project_id, _client, grouped_sensors, sensors=_sensors,
+                                  catalog=CatalogCache(project_id))
+
+
+# Taille maximale (octets) d'un export chargé en mémoire dès l'affichage du bouton de téléchargement ;
+# au-delà, le fichier est enregistré dans EXPORT_DIR et n'est lu qu'au clic sur le bouton
+DOWNLOAD_MAX_BYTES = 200 * 1024 ** 2
+
+# Nombre de lignes affichées dans l'aperçu de chaque type de capteur
+PREVIEW_ROWS = 20
+
+
+class IncompleteExtraction(Exception):
+    """
+    Carries the result of an extraction with failed requests out of a cached function,
+    so that Streamlit does not cache it and the next run retries the failed windows.
+    """
+
+    def __init__(self, result, failures):
+        super().__init__(f"{len(failures)} requête(s) en échec")
+        self.result = result
+        self.failures = failures
+
+
+# Tableaux par type de capteur déjà extraits dans cette session : paramètres -> (instant, DataFrame).
+# Gardés dans st.session_state plutôt que par st.cache_data, qui rejouerait les appels à la barre
+# de progression (créée hors de la fonction) à chaque lecture du cache
+TYPE_FRAMES_KEY = 'type_frames'
+
+
+def extract_type_frame(project_id, group, start_time, end_time, selected_data, use_local_cache,
+                       resolution, aggregation, layout, client, progress=None):
+    """
+    Extracts and builds the frame of one sensor type.
+
+    Returns:
+        tuple: (DataFrame, list of failed requests).
+    """
+    cache = TimeseriesCache(project_id) if use_local_cache else None
+    failures = []
+    raw_sensor_data = extract_data(project_id, client, [group], start_time, end_time, selected_data,
+                                   cache=cache, failures=failures, progress=progress)
+    frames = create_dataframes_by_type(raw_sensor_data, [group], resolution=resolution, aggregation=aggregation,
+                                       layout=layout)
+    return frames[group['type']], failures
+
+
+def preview(frame):
+    """
+    First rows of a frame, with sparse columns (wide layout) made dense for st.dataframe.
+    """
+    head = frame.head(PREVIEW_ROWS)
+    sparse = [column for column, dtype in head.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+    return head.astype({column: head[column].dtype.subtype for column in sparse}) if sparse else head
+
+
+def extract_sensor_frames(project_id, account, grouped_sensors, start_time, end_time, selected_data, use_local_cache,
+                          resolution, aggregation, layout, client):
+    """
+    Extracts the sensor types one after the other with a progress bar (ETA included) and shows
+    a preview of each type as soon as its frame is ready.
+
+    Each complete type is kept in the session for DATA_TTL seconds, so a rerun (or a second
+    click) resumes with the types not extracted yet. A type with failed requests is not kept:
+    the next run retries it (the windows already received are kept by the local cache).
+
+    Returns:
+        tuple: (dict sensor type -> DataFrame, list of failed requests).
+    """
+    stored = st.session_state.setdefault(TYPE_FRAMES_KEY, {})
+    now = time.time()
+    for key in [key for key, (stored_at, _) in stored.items() if now - stored_at >= DATA_TTL]:
+        del stored[key]
+
+    # Avancement pondéré par le nombre de séries de chaque type
+    weights = [len(plan_series([group], selected_data)) for group in grouped_sensors]
+    total = sum(weights) or 1
+    bar = st.progress(0.0, text="Extraction des données capteurs...")
+    start = time.perf_counter()
+    frames, failures = {}, []
+    completed = 0
+
+    for group, weight in zip(grouped_sensors, weights):
+        def report(done, requests, group=group, weight=weight):
+            fraction = (completed + (weight * done / requests if requests else weight)) / total
+            elapsed = time.perf_counter() - start
+            eta = f", reste ≈ {elapsed * (1 - fraction) / fraction:.0f} s" if 0 < fraction < 1 else ""
+            bar.progress(min(fraction, 1.0), text=f"{group['type']} : {done}/{requests} requête(s){eta}")
+
+        key = json.dumps([project_id, account, group, start_time, end_time, selected_data, use_local_cache,
+                          resolution, aggregation, layout], sort_keys=True)
+        if key in stored:
+            frame, type_failures = stored[key][1], []
+        else:
+            frame, type_failures = extract_type_frame(
+                project_id, group, start_time, end_time, selected_data, use_local_cache,
+                resolution, aggregation, layout, client, progress=report
+            )
+            if not type_failures:
+                stored[key] = (time.time(), frame)
+        completed += weight
+        frames[group['type']] = frame
+        failures.extend(type_failures)
+        bar.progress(completed / total, text=f"{group['type']} : terminé")
+
+        with st.expander(f"Aperçu : {group['type']} ({len(frame)} ligne(s))"):
+            st.dataframe(preview(frame), use_container_width=True)
+
+    bar.progress(1.0, text=f"Extraction terminée en {time.perf_counter() - start:.1f} s.")
+    return frames, failures
+
+
+@st.cache_data(ttl=SNAPSHOT_TTL, show_spinner="Récupération des dernières valeurs...")
+def cached_snapshot(project_id, account, grouped_sensors, selected_data, refreshed_at, _client):
+    failures = []
+    snapshot = sensor_snapshot(project_id, _client, grouped_sensors, selected_data, failures=failures)
+    return snapshot, failures
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner="Récupération des assets...")
+def cached_assets(project_id, account, refreshed_at, _client):
+    assets = get_assets(project_id, _client, catalog=CatalogCache(project_id))
+    return get_dict_of_id_assets(assets), get_asset_datapoint_codes(assets)
+
+
+@st.cache_data(ttl=DATA_TTL, show_spinner="Extraction des données assets...")
+def cached_asset_frame(project_id, account, grouped_assets, start_time, end_time, asset_datapoints,
+                       resolution, aggregation, layout, refreshed_at, _client):
+    failures = []
+    raw_asset_data = extract_asset(project_id, _client, grouped_assets, start_time, end_time,
+                                   datapoints=asset_datapoints, failures=failures)
+    frame = create_assets_df(raw_asset_data, grouped_assets, datapoints=asset_datapoints,
+                             resolution=resolution, aggregation=aggregation, layout=layout)
+    if failures:
+        # Résultat incomplet non mis en cache (voir IncompleteExtraction)
+        raise IncompleteExtraction(frame, failures)
+    return frame, failures
+
+
+def show_failures(failures):
+    """
+    Lists the requests that failed permanently, so an incomplete export is never silent.
+    """
+    if not failures:
+        return
+    st.warning(
+        f"⚠️ {len(failures)} série(s) incomplète(s) : certaines requêtes ont échoué malgré les nouvelles tentatives. "
+        "Cliquez sur « Rafraîchir les données » pour relancer l'extraction."
+    )
+    with st.expander("Détail des requêtes en échec"):
+        st.dataframe(pd.DataFrame(failures), use_container_width=True)
+
+
+def show_metrics(report, container):
+    """
+    Displays the per-stage measures of the current script run (see Z04_instrumentation).
+    """
+    with container.container():
+        st.subheader("⏱️ Mesures")
+        if not report['stages']:
+            st.caption("Aucune étape exécutée (résultats servis par le cache).")
+            return
+        rows = [
+            {
+                'Étape': name,
+                'Durée (s)': stage['seconds'],
+                'Requêtes': stage['requests'],
+                'Erreurs': stage['errors'],
+                'Reçu (Mo)': round(stage['bytes'] / 1e6, 2),
+                'p50 (ms)': stage['latency_ms']['p50'] if stage['latency_ms'] else None,
+                'p90 (ms)': stage['latency_ms']['p90'] if stage['latency_ms'] else None,
+                'Lignes': stage['rows'],
+            }
+            for name, stage in report['stages'].items()
+        ]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        st.caption(f"Exécution : {report['seconds']:.1f} s, {report['totals']['requests']} requête(s). "
+                   "Les étapes servies par le cache n'apparaissent pas.")
+
+
 st.set_page_config(page_title="API Beyond Interface", layout="wide")
+# Mesures de cette exécution du script, affichées en fin de page dans la barre latérale
+run_metrics = RunMetrics().install()
 logo = Image.open("SIXENSE_logo.png")
 st.image(logo, width=200)
 st.title("Application API Beyond Monitoring")
@@ -22,8 +238,41 @@ st.header("1. Connexion")
 email = st.text_input("Email")
 password = st.text_input("Mot de passe", type="password")
 
+if st.sidebar.button("🔄 Rafraîchir les données"):
+    # Nouvelle clé de cache pour cette session seulement : ses prochaines lectures interrogent à nouveau
+    # l'API, sans vider le cache (partagé par tout le serveur) des autres sessions
+    st.session_state[REFRESH_KEY] = time.time()
+    st.session_state.pop(TYPE_FRAMES_KEY, None)
+    # Catalogues locaux revalidés (requête conditionnelle) à la prochaine lecture
+    expire_catalogs()
+
+# Résolution des séries exportées et méthode d'agrégation des points de chaque période
+RESOLUTIONS = {"Horaire": "1h", "15 minutes": "15min", "Journalière": "1D"}
+resolution = RESOLUTIONS[st.sidebar.selectbox("Résolution", list(RESOLUTIONS))]
+aggregation = st.sidebar.selectbox(
+    "Agrégation", AGGREGATIONS, index=AGGREGATIONS.index(DEFAULT_AGGREGATION),
+    help="sample : point situé au début de chaque période ; mean/first/last/min/max : calcul sur tous les points"
+)
+
+# Tableaux larges (une colonne par capteur-donnée) ou longs (une ligne par point, sans pivot)
+LAYOUT_LABELS = {"Large (une colonne par capteur)": "wide", "Long (Timestamp, Sensor, Datatype, Value)": "long"}
+layout = LAYOUT_LABELS[st.sidebar.selectbox(
+    "Mise en forme", list(LAYOUT_LABELS),
+    help="Long : taille proportionnelle au nombre de points, adapté aux capteurs qui ne mesurent pas aux mêmes instants"
+)]
+
+use_local_cache = st.sidebar.checkbox(
+    "💾 Cache local des séries (ne télécharge que les périodes manquantes)", value=True
+)
+metrics_panel = st.sidebar.empty()
+refreshed_at = st.session_state.get(REFRESH_KEY, 0)
+
 if email and password:
-    headers = login(email, password)
+    client = cached_login(email, password)
+    if not client.auth.can_refresh():
+        # Session expirée (jeton de rafraîchissement périmé) : nouvelle connexion
+        cached_login.clear()
+        client = cached_login(email, password)
 
     # --- PROJET ---
     st.header("2. Sélection du projet")
@@ -54,39 +303,94 @@ if email and password:
     st.header("4. Données capteurs")
     df_sensors = pd.DataFrame()
     if st.checkbox("📡 Télécharger les données capteurs"):
-        sensors = get_sensors(project_id_val, headers)
+        sensors = cached_sensors(project_id_val, email, refreshed_at, client)
         unique_types = get_list_of_sensor_types(sensors)
         sensor_types = choose_sensor_types(unique_types, project_key=project_key)
         grouped_sensors = get_dict_of_id_sensors(sensors, sensor_types)
 
-        all_datapoints = derivedDatapoints_list(project_id_val, headers, grouped_sensors)
+        all_datapoints = cached_datapoints(project_id_val, email, grouped_sensors, refreshed_at, client, sensors)
         selected_data = select_derived_datapoints(all_datapoints, project_key=project_key)
-        raw_sensor_data = extract_data(project_id_val, headers, grouped_sensors, start_time, end_time, selected_data)
-        df_sensors = create_dataframes_by_type(raw_sensor_data, grouped_sensors)
-        st.success("Données capteurs téléchargées.")
+
+        if st.checkbox("⚡ Dernières valeurs uniquement (état actuel du site, sans historique)"):
+            # Quelques requêtes onlyLatest au lieu de la période complète
+            df_snapshot, sensor_failures = cached_snapshot(project_id_val, email, grouped_sensors, selected_data,
+                                                          refreshed_at, client)
+            show_failures(sensor_failures)
+            st.dataframe(df_snapshot, use_container_width=True)
+            df_sensors = {SNAPSHOT_SHEET: df_snapshot}
+        else:
+            df_sensors, sensor_failures = extract_sensor_frames(
+                project_id_val, email, grouped_sensors, start_time, end_time, selected_data, use_local_cache,
+                resolution, aggregation, layout, client
+            )
+            show_failures(sensor_failures)
+            st.success("Données capteurs téléchargées.")
 
     # --- ASSETS ---
     st.header("5. Données assets")
     df_assets = pd.DataFrame()
     if st.checkbox("🏗️ Télécharger les données assets"):
-        assets = get_assets(project_id_val, headers)
-        grouped_assets = get_dict_of_id_assets(assets)
-        raw_asset_data = extract_asset(project_id_val, headers, grouped_assets, start_time, end_time)
-        df_assets = create_assets_df(raw_asset_data, grouped_assets)
+        grouped_assets, asset_codes = cached_assets(project_id_val, email, refreshed_at, client)
+        asset_datapoints = st.multiselect(
+            "Données dérivées des assets :", asset_codes, default=list(DEFAULT_ASSET_DATAPOINTS)
+        )
+        if not asset_datapoints:
+            st.warning("Aucune donnée asset sélectionnée.")
+            st.stop()
+        try:
+            df_assets, asset_failures = cached_asset_frame(
+                project_id_val, email, grouped_assets, start_time, end_time, tuple(asset_datapoints),
+                resolution, aggregation, layout, refreshed_at, client
+            )
+        except IncompleteExtraction as incomplete:
+            df_assets, asset_failures = incomplete.result, incomplete.failures
+        show_failures(asset_failures)
         st.success("Données assets téléchargées.")
 
     # --- EXPORT ---
-    st.header("6. Export Excel")
-    if st.button("📤 Générer et proposer le fichier Excel"):
-        excel_bytes = export_dict_of_dfs_to_excel(df_sensors, extra_df=df_assets)
-        filename = f"{project_name}_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.xlsx"
-
-        st.download_button(
-            label="📥 Télécharger le fichier Excel",
-            data=excel_bytes,
-            file_name=filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    st.header("6. Export")
+    formats = available_formats()
+    export_format = st.selectbox(
+        "Format", formats, index=formats.index(DEFAULT_EXPORT_FORMAT),
+        format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
+        help="Excel : un onglet par type de capteur ; Parquet / CSV : un fichier par type de capteur dans une archive zip"
+    )
+    partition_by_month = export_format == 'parquet' and st.checkbox("Partitionner les fichiers Parquet par mois")
+
+    if st.button("📤 Générer et proposer le fichier"):
+        # Fichier écrit dans un fichier temporaire, sans copie complète en mémoire
+        export_path = export_frames(df_sensors, extra_df=df_assets, fmt=export_format,
+                                    partition_by_month=partition_by_month)
+        extension = EXPORT_FORMATS[export_format]['extension']
+        filename = f"{project_name}_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{extension}"
+        size = os.path.getsize(export_path)
+
+        if size <= DOWNLOAD_MAX_BYTES:
+            # Le bouton de téléchargement garde le contenu complet du fichier en mémoire
+            with open(export_path, 'rb') as export_file:
+                st.download_button(
+                    label="📥 Télécharger le fichier",
+                    data=export_file.read(),
+                    file_name=filename,
+                    mime=EXPORT_FORMATS[export_format]['mime']
+                )
+            os.remove(export_path)
+        else:
+            # Fichier volumineux : déplacé dans le dossier des exports, lu seulement si l'utilisateur le télécharge
+            # (Streamlit le garde alors en mémoire le temps du téléchargement)
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            target = os.path.join(EXPORT_DIR, filename)
+            shutil.move(export_path, target)
+            st.download_button(
+                label=f"📥 Télécharger le fichier ({size / 1e6:.0f} Mo)",
+                data=lambda: Path(target).read_bytes(),
+                file_name=filename,
+                mime=EXPORT_FORMATS[export_format]['mime']
+            )
+            st.caption(f"Fichier également enregistré sur le serveur de l'application : {target} "
+                       "(accessible directement seulement si l'application tourne sur votre poste).")
 
 else:
     st.info("Veuillez renseigner vos identifiants pour vous connecter.")
+
+show_metrics(run_metrics.report(), metrics_panel)
@@ -0,0 +1,447 @@
+"""
+Headless batch export of Beyond Monitoring data (no Streamlit UI).
+
+Examples:
+    python A01_batch_export.py --project "Paris - Ecole Murat" --days 30 --output "exports/{project}_{date}.xlsx"
+    python A01_batch_export.py --job jobs/nightly.json
+    python A01_batch_export.py --all-projects --days 1 --project-workers 3 --api-concurrency 12
+    python A01_batch_export.py --all-projects --latest --assets --output "status/{project}.xlsx"
+    python A01_batch_export.py --project "Paris - Ecole Murat" --days 365 --format parquet --partition-by-month --output "exports/{project}"
+    python A01_batch_export.py --all-projects --days 1 --report "reports/run_{timestamp}.json"
+    python A01_batch_export.py --all-projects --days 1 --cache-dir /var/cache/beyond
+
+Credentials are read from the BEYOND_EMAIL and BEYOND_PASSWORD environment variables
+(or --email / --password). A job file is a JSON object whose keys are the long option
+names (e.g. {"projects": [...], "sensor_types": [...], "days": 1}); command line options
+override it. The local caches are kept under --cache-dir (by default the configuration
+folder: BEYOND_API_DIR, or ~/.beyond_api, C:\\Temp\\API on Windows).
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from B00_login import login
+from B10_select_project_id import read_projects
+from B11_sensors_list import get_sensors, get_list_of_sensor_types, get_dict_of_id_sensors
+from B12_sensor_informations import derivedDatapoints_list, extract_data, create_dataframes_by_type
+from B01_api_client import DEFAULT_MAX_RETRIES
+from B02_fetch_engine import DEFAULT_MAX_WORKERS
+from B13_timeseries_cache import TimeseriesCache
+from B17_catalog import CatalogCache
+from B16_latest_values import sensor_snapshot, asset_snapshot, SNAPSHOT_SHEET
+from B20_assets import get_assets, get_dict_of_id_assets, extract_asset, create_dataframes_by_type as create_assets_df
+from B20_assets import DEFAULT_ASSET_DATAPOINTS
+from B31_exporters import EXPORT_FORMATS, DEFAULT_EXPORT_FORMAT, available_formats, export_frames
+import Z02_messages as messages
+from Z04_instrumentation import RunMetrics
+from Z01_time_windows import DEFAULT_TIME_CHUNK
+from Z03_resampling import AGGREGATIONS, DEFAULT_AGGREGATION, DEFAULT_RESOLUTION, LAYOUTS, DEFAULT_LAYOUT
+from Z00_get_user_choice import get_user_choice, get_multiple_user_choices
+from config_handler import CONFIG_DIR
+
+PROJECTS_FILE = Path(__file__).parent / "projects_list.txt"
+
+# Format des identifiants de projet (ex. 64ca3bcf9cd046c3c735058d)
+PROJECT_ID_PATTERN = re.compile(r'[0-9a-fA-F]{24}')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Export Beyond Monitoring sans interface.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument('--job', help="Fichier JSON décrivant l'export (les options de la ligne de commande priment)")
+    parser.add_argument('--projects', '--project', nargs='+', default=[],
+                        help="Noms (tels que dans projects_list.txt) ou identifiants des projets")
+    parser.add_argument('--all-projects', action='store_true',
+                        help="Exporte tous les projets de projects_list.txt")
+    parser.add_argument('--project-workers', type=int, default=2,
+                        help="Nombre de projets exportés simultanément")
+    parser.add_argument('--api-concurrency', type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Nombre maximal de requêtes API simultanées, tous projets confondus")
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Nouvelles tentatives sur erreurs transitoires (429, 5xx, réseau)")
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help="Nombre maximal de requêtes API par seconde (tous projets confondus)")
+    parser.add_argument('--sensor-types', nargs='+', default=None,
+                        help="Types de capteurs à exporter (par défaut : tous)")
+    parser.add_argument('--datapoints', nargs='+', default=None,
+                        help="Noms des données dérivées à exporter (par défaut : toutes)")
+    parser.add_argument('--start', help="Date de début (AAAA-MM-JJ)")
+    parser.add_argument('--end', help="Date de fin (AAAA-MM-JJ)")
+    parser.add_argument('--days', type=int,
+                        help="Exporte les N derniers jours complets (remplace --start/--end)")
+    parser.add_argument('--latest', type=int, nargs='?', const=1, default=None, metavar='N',
+                        help="Exporte seulement les N dernières valeurs de chaque série (1 par défaut) "
+                             "dans un tableau unique, au lieu de la période")
+    parser.add_argument('--no-sensors', action='store_true', help="N'exporte pas les données capteurs")
+    parser.add_argument('--assets', action='store_true', help="Exporte aussi les données assets")
+    parser.add_argument('--asset-datapoints', nargs='+', default=list(DEFAULT_ASSET_DATAPOINTS),
+                        help="Codes des données dérivées des assets")
+    parser.add_argument('--output', default=None,
+                        help="Chemin du fichier produit ; {project}, {date} et {timestamp} sont remplacés "
+                             "(par défaut : {project}_{timestamp} suivi de l'extension du format)")
+    parser.add_argument('--format', default=DEFAULT_EXPORT_FORMAT, choices=list(EXPORT_FORMATS),
+                        help="xlsx ; parquet ou csv : un fichier par type de capteur (zip, ou dossier "
+                             "pour parquet si --output ne se termine pas par .zip)")
+    parser.add_argument('--partition-by-month', action='store_true',
+                        help="Parquet : un sous-dossier par mois pour chaque type de capteur")
+    parser.add_argument('--resolution', default=DEFAULT_RESOLUTION,
+                        help="Résolution des séries exportées (alias pandas : 1h, 15min, 1D...)")
+    parser.add_argument('--aggregation', default=DEFAULT_AGGREGATION, choices=AGGREGATIONS,
+                        help="sample : point au début de chaque période ; sinon agrégation de tous les points")
+    parser.add_argument('--layout', default=DEFAULT_LAYOUT, choices=LAYOUTS,
+                        help="wide : une colonne par capteur-donnée ; long : Timestamp, Sensor, Datatype, Value (sans pivot)")
+    parser.add_argument('--time-chunk', default=DEFAULT_TIME_CHUNK, choices=['month', 'week', 'day', 'none'],
+                        help="Découpage des longues périodes en sous-requêtes parallèles")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Désactive le cache local des séries et du catalogue des capteurs/assets")
+    parser.add_argument('--cache-dir', default=CONFIG_DIR,
+                        help="Dossier des caches locaux (sous-dossiers cache et catalog) ; par défaut le dossier "
+                             "de configuration (variable d'environnement BEYOND_API_DIR)")
+    parser.add_argument('--report', default=None,
+                        help="Fichier JSON des mesures de l'exécution (durée, requêtes, octets, latences, lignes "
+                             "par étape et par projet) ; {date} et {timestamp} sont remplacés")
+    parser.add_argument('--interactive', action='store_true',
+                        help="Demande dans la console les projets et types de capteurs non précisés")
+    parser.add_argument('--platform', default='EU', choices=['EU', 'AUS', 'USA'])
+    parser.add_argument('--email', default=os.environ.get('BEYOND_EMAIL'))
+    parser.add_argument('--password', default=os.environ.get('BEYOND_PASSWORD'))
+    return parser
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line, using the job file (if any) as defaults.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.job:
+        with open(args.job, 'r', encoding='utf-8') as f:
+            job = json.load(f)
+        parser.set_defaults(**job)
+        args = parser.parse_args(argv)
+
+    if args.output is None:
+        args.output = "{project}_{timestamp}" + EXPORT_FORMATS[args.format]['extension']
+
+    return args
+
+
+def time_window(args):
+    """
+    Returns (start_time, end_time) in the API format from --days or --start/--end.
+    """
+    today = datetime.date.today()
+    if args.days:
+        start_date = today - datetime.timedelta(days=args.days)
+        end_date = today - datetime.timedelta(days=1)
+    else:
+        start_date = datetime.date.fromisoformat(args.start) if args.start else today
+        end_date = datetime.date.fromisoformat(args.end) if args.end else today
+    return f"{start_date}T00:00:00.000Z", f"{end_date}T23:59:59.000Z"
+
+
+def resolve_projects(values, projects):
+    """
+    Maps project names or ids to (project_id, project_name) using projects_list.txt.
+
+    A value missing from the list is only accepted if it looks like a project id
+    (24 hexadecimal characters); otherwise a ValueError names the unknown projects.
+    """
+    by_name = {name: pid for name, pid in projects}
+    by_id = {pid: name for name, pid in projects}
+
+    resolved, unknown = [], []
+    for value in values:
+        if value in by_name:
+            resolved.append((by_name[value], value))
+        elif value in by_id:
+            resolved.append((value, by_id[value]))
+        elif PROJECT_ID_PATTERN.fullmatch(value):
+            # Identifiant absent de la liste : on l'utilise tel quel
+            resolved.append((value, value))
+        else:
+            unknown.append(value)
+
+    if unknown:
+        raise ValueError(f"Projet(s) introuvable(s) dans projects_list.txt : {', '.join(unknown)}")
+    return resolved
+
+
+def select_datapoints(all_datapoints, names=None):
+    """
+    Builds the selected_data structure of extract_data from datapoint names (None keeps all).
+    """
+    return [
+        {
+            "sensor_type": group['sensor_type'],
+            "selectedDerivedDatapoints": [
+                dp for dp in group['derivedDatapoints']
+                if names is None or dp['name'] in names or dp['code'] in names
+            ]
+        }
+        for group in all_datapoints
+    ]
+
+
+def output_path(template, project_name, now=None):
+    now = now or datetime.datetime.now()
+    safe_name = "".join(c if c.isalnum() or c in " -_" else "_" for c in project_name).strip()
+    return template.format(
+        project=safe_name,
+        date=now.strftime('%Y-%m-%d'),
+        timestamp=now.strftime('%Y-%m-%d_%H-%M-%S')
+    )
+
+
+def project_catalog(project_id, args):
+    """
+    Returns the local catalog of a project (B17_catalog), or None with --no-cache.
+    """
+    return None if args.no_cache else CatalogCache(project_id, os.path.join(args.cache_dir, 'catalog'))
+
+
+def select_sensors(client, project_id, project_name, args):
+    """
+    Returns (grouped_sensors, selected_data) for the sensor types and datapoints chosen in args.
+    """
+    catalog = project_catalog(project_id, args)
+    sensors = get_sensors(project_id, client, catalog=catalog)
+    sensor_types = args.sensor_types
+    if not sensor_types and args.interactive:
+        sensor_types = get_multiple_user_choices(
+            f"Types de capteurs à exporter pour {project_name} :",
+            get_list_of_sensor_types(sensors),
+            project_key=project_id
+        )
+    sensor_types = sensor_types or get_list_of_sensor_types(sensors)
+    grouped_sensors = get_dict_of_id_sensors(sensors, sensor_types)
+
+    all_datapoints = derivedDatapoints_list(project_id, client, grouped_sensors, sensors=sensors, catalog=catalog)
+    return grouped_sensors, select_datapoints(all_datapoints, args.datapoints)
+
+
+def export_snapshot(client, project_id, project_name, args, failures=None):
+    """
+    Writes the latest value(s) of every selected sensor (and asset with --assets) in a single table.
+
+    Returns:
+        str: The path of the written file.
+    """
+    frames = []
+    if not args.no_sensors:
+        grouped_sensors, selected_data = select_sensors(client, project_id, project_name, args)
+        frames.append(sensor_snapshot(project_id, client, grouped_sensors, selected_data,
+                                      limit=args.latest, failures=failures))
+    if args.assets:
+        assets = get_assets(project_id, client, catalog=project_catalog(project_id, args))
+        grouped_assets = get_dict_of_id_assets(assets)
+        frames.append(asset_snapshot(project_id, client, grouped_assets, tuple(args.asset_datapoints),
+                                     limit=args.latest, failures=failures))
+
+    path = output_path(args.output, project_name)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return export_frames({SNAPSHOT_SHEET: snapshot}, fmt=args.format, path=path)
+
+
+def export_project(client, project_id, project_name, args, failures=None):
+    """
+    Runs the full extraction for one project and writes its export (args.format).
+
+    Requests that still fail after the client's retries are appended to `failures`.
+    With --latest, only the latest values are exported (see export_snapshot).
+
+    Returns:
+        str: The path of the written file.
+    """
+    if args.latest:
+        return export_snapshot(client, project_id, project_name, args, failures=failures)
+
+    start_time, end_time = time_window(args)
+    time_chunk = None if args.time_chunk == 'none' else args.time_chunk
+    df_sensors = {}
+    df_assets = None
+
+    if not args.no_sensors:
+        grouped_sensors, selected_data = select_sensors(client, project_id, project_name, args)
+        cache = None if args.no_cache else TimeseriesCache(project_id, os.path.join(args.cache_dir, 'cache'))
+        raw_sensor_data = extract_data(project_id, client, grouped_sensors, start_time, end_time, selected_data,
+                                       cache=cache, time_chunk=time_chunk, failures=failures)
+        df_sensors = create_dataframes_by_type(raw_sensor_data, grouped_sensors,
+                                               resolution=args.resolution, aggregation=args.aggregation,
+                                               layout=args.layout)
+
+    if args.assets:
+        asset_datapoints = tuple(args.asset_datapoints)
+        assets = get_assets(project_id, client, catalog=project_catalog(project_id, args))
+        grouped_assets = get_dict_of_id_assets(assets)
+        raw_asset_data = extract_asset(project_id, client, grouped_assets, start_time, end_time,
+                                       datapoints=asset_datapoints, time_chunk=time_chunk, failures=failures)
+        df_assets = create_assets_df(raw_asset_data, grouped_assets, datapoints=asset_datapoints,
+                                     resolution=args.resolution, aggregation=args.aggregation,
+                                     layout=args.layout)
+
+    path = output_path(args.output, project_name)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return export_frames(df_sensors, extra_df=df_assets, fmt=args.format, path=path,
+                         partition_by_month=args.partition_by_month)
+
+
+def run_projects(client, targets, args):
+    """
+    Exports several projects concurrently (at most args.project_workers at a time, one at a
+    time with --interactive so that console prompts do not interleave).
+
+    The API client is shared, so its max_concurrency cap applies to all projects together.
+
+    Returns:
+        list: One dict per project: {'project', 'path', 'seconds', 'error', 'failures', 'metrics'}, in input
+        order; 'metrics' is the per-stage report of Z04_instrumentation.RunMetrics.
+    """
+    total = len(targets)
+    done = [0]
+    lock = threading.Lock()
+
+    def run(target):
+        project_id, project_name = target
+        messages.info(f"▶ {project_name} : début de l'export")
+        start = time.perf_counter()
+        result = {'project': project_name, 'path': None, 'seconds': None, 'error': None, 'failures': []}
+        metrics = RunMetrics()
+        with metrics.activate():
+            try:
+                result['path'] = export_project(client, project_id, project_name, args, failures=result['failures'])
+            except messages.ExtractionStopped as e:
+                result['error'] = str(e)
+            except Exception as e:
+                # Un projet en échec ne doit pas interrompre les autres
+                result['error'] = f"{type(e).__name__} : {e}"
+        result['seconds'] = time.perf_counter() - start
+        result['metrics'] = metrics.report()
+
+        with lock:
+            done[0] += 1
+            state = "échec" if result['error'] else "terminé"
+            messages.info(f"[{done[0]}/{total}] {project_name} : {state} en {result['seconds']:.1f} s")
+        return result
+
+    # Questions posées dans la console (--interactive) : un projet à la fois pour ne pas mélanger les saisies
+    workers = 1 if args.interactive else max(1, min(args.project_workers, total))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, targets))
+
+
+def write_report(path, session_metrics, results):
+    """
+    Writes the JSON run report: login measures, totals, then per-project outcome and per-stage measures
+    (see Z04_instrumentation.RunMetrics.report).
+    """
+    session = session_metrics.report()
+    projects = [
+        {
+            'project': result['project'],
+            'path': result['path'],
+            'seconds': round(result['seconds'], 3),
+            'error': result['error'],
+            'failed_series': len(result['failures']),
+            'totals': result['metrics']['totals'],
+            'stages': result['metrics']['stages'],
+        }
+        for result in results
+    ]
+    report = {
+        'started': session['started'],
+        'seconds': session['seconds'],
+        'totals': {key: session['totals'][key] + sum(project['totals'][key] for project in projects)
+                   for key in session['totals']},
+        'login': session['stages'].get('login'),
+        'projects': projects,
+    }
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    messages.info(f"Rapport d'exécution : {path}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    projects = read_projects(str(PROJECTS_FILE)) or []
+
+    if args.all_projects:
+        args.projects = [name for name, _ in projects]
+
+    if not args.projects and args.interactive and projects:
+        choice = get_user_choice("Projet à exporter :", [name for name, _ in projects])
+        args.projects = [projects[choice][0]]
+
+    if not args.projects:
+        messages.error("Aucun projet indiqué (--projects, --all-projects ou clé 'projects' du fichier job).")
+        return 2
+    if args.format not in available_formats():
+        messages.error(f"Format {args.format} indisponible : installer pyarrow (pip install pyarrow).")
+        return 2
+    if len(args.projects) > 1 and '{project}' not in args.output:
+        messages.error("Avec plusieurs projets, --output doit contenir {project} (un fichier par projet).")
+        return 2
+    if not args.email or not args.password:
+        messages.error("Identifiants manquants : définir BEYOND_EMAIL et BEYOND_PASSWORD.")
+        return 2
+    try:
+        targets = resolve_projects(args.projects, projects)
+    except ValueError as e:
+        messages.error(str(e))
+        return 2
+
+    session_metrics = RunMetrics()
+    try:
+        with session_metrics.activate():
+            client = login(args.email, args.password, platform=args.platform,
+                           pool_size=args.api_concurrency,  # une connexion par requête en vol, corps compris
+                           max_concurrency=args.api_concurrency, max_retries=args.max_retries,
+                           rate_limit=args.rate_limit)
+    except messages.ExtractionStopped:
+        return 1
+
+    results = run_projects(client, targets, args)
+
+    messages.info("\nRécapitulatif :")
+    for result in results:
+        outcome = result['path'] if not result['error'] else f"ÉCHEC - {result['error']}"
+        if result['failures']:
+            outcome += f" (INCOMPLET : {len(result['failures'])} série(s) en échec)"
+        messages.info(f"  {result['project']:<45} {result['seconds']:7.1f} s  {outcome}")
+
+    # Rapport des requêtes définitivement en échec
+    for result in results:
+        for failure in result['failures']:
+            messages.warning(
+                f"{result['project']} : {failure['sensor_type']} / {failure['sensor']} / {failure['datapoint']} "
+                f"[{failure['start']} -> {failure['end']}] : {failure['status']}"
+            )
+
+    if args.report:
+        write_report(output_path(args.report, ''), session_metrics, results)
+
+    return 1 if any(result['error'] or result['failures'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
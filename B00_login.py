@@ -1,17 +1,134 @@
+import threading
+import time
+
 import requests
-import streamlit as st
 
-def login(email, password, platform='EU'):
+import Z02_messages as messages
+
+import Z04_instrumentation as instrumentation
+from B01_api_client import ApiClient, API_BASE_URL, DEFAULT_POOL_SIZE, DEFAULT_MAX_RETRIES
+
+CLIENT_ID = 'app-bm-api'
+
+# Le jeton d'accès est renouvelé lorsqu'il lui reste moins de REFRESH_MARGIN secondes de validité
+REFRESH_MARGIN = 60
+
+
+class AuthError(Exception):
+    """
+    Raised when the access token can no longer be refreshed (refresh token expired or revoked).
+    """
+
+
+class AuthManager:
     """
-    Authenticates a user via OpenID Connect and returns auth headers.
+    Keeps the OpenID Connect tokens of a session and refreshes the access token before it expires.
+
+    Shared by every request of an ApiClient (and every thread using it), so long
+    extractions keep a valid token instead of failing midway.
+
+    Args:
+        session (requests.Session): Session used for the token endpoint.
+        token_url (str): OpenID Connect token endpoint.
+        token_data (dict): Response of the password grant.
+        timeout (float): Timeout of the refresh calls in seconds.
+    """
+
+    def __init__(self, session, token_url, token_data, timeout=30):
+        self._session = session
+        self._token_url = token_url
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        # Motif du refus du jeton de rafraîchissement : plus aucun renouvellement n'est tenté ensuite
+        self._rejected = None
+        self._store(token_data)
+
+    def _store(self, token_data):
+        now = time.time()
+        self.access_token = token_data['access_token']
+        self.refresh_token = token_data.get('refresh_token', getattr(self, 'refresh_token', None))
+        self.expires_at = now + float(token_data.get('expires_in') or 300)
+        refresh_expires_in = token_data.get('refresh_expires_in')
+        # refresh_expires_in = 0 : jeton de rafraîchissement sans expiration (offline)
+        self.refresh_expires_at = now + float(refresh_expires_in) if refresh_expires_in else None
+
+    def can_refresh(self):
+        """
+        Returns True while the refresh token is still usable.
+        """
+        if not self.refresh_token or self._rejected:
+            return False
+        return self.refresh_expires_at is None or time.time() < self.refresh_expires_at - REFRESH_MARGIN
+
+    def refresh(self, force=False, rejected_token=None):
+        """
+        Renews the access token with the refresh token (only when close to expiry unless force).
+
+        rejected_token is the token refused by the API (401): if another thread renewed the
+        token in the meantime, the forced refresh is skipped (one renewal for concurrent 401s).
+        Once the token endpoint has rejected the refresh token, AuthError is raised straight
+        away, without calling it again.
+        """
+        with self._lock:
+            if not force and time.time() < self.expires_at - REFRESH_MARGIN:
+                return
+            if force and rejected_token is not None and rejected_token != self.access_token:
+                return
+            if self._rejected:
+                raise AuthError(self._rejected)
+            if not self.refresh_token:
+                raise AuthError("Aucun jeton de rafraîchissement disponible.")
+
+            response = self._session.post(
+                self._token_url,
+                data={
+                    'client_id': CLIENT_ID,
+                    'grant_type': 'refresh_token',
+                    'refresh_token': self.refresh_token,
+                },
+                timeout=self._timeout
+            )
+            if response.status_code != 200 or 'access_token' not in response.json():
+                message = f"Renouvellement du jeton impossible : {response.status_code} - {response.text}"
+                # Jeton de rafraîchissement refusé (expiré ou révoqué, invalid_grant) : échec définitif ;
+                # une erreur du serveur d'authentification (5xx) laisse les requêtes suivantes réessayer
+                if response.status_code < 500:
+                    self._rejected = message
+                raise AuthError(message)
+            self._store(response.json())
+
+    def headers(self):
+        """
+        Returns the authorization headers, refreshing the access token first if needed.
+        """
+        self.refresh()
+        return {
+            'authorization': f'Bearer {self.access_token}',
+            'x-auth-request-access-token': self.access_token,
+        }
+
+
+@instrumentation.stage('login')
+def login(email, password, platform='EU', base_url=API_BASE_URL, pool_size=DEFAULT_POOL_SIZE, max_concurrency=None,
+          max_retries=DEFAULT_MAX_RETRIES, rate_limit=None, token_url=None):
+    """
+    Authenticates a user via OpenID Connect and returns an API client.
 
     Args:
         email (str): User's email.
         password (str): User's password.
         platform (str): One of 'EU', 'AUS', 'USA'.
+        base_url (str): Base URL of the Beyond Monitoring API.
+        pool_size (int): Maximum number of pooled connections per host.
+        max_concurrency (int, optional): Global cap on concurrent requests through the client.
+        max_retries (int): Retries of transient API errors (429, 5xx, network).
+        rate_limit (float, optional): Maximum sustained requests per second.
+        token_url (str, optional): Token endpoint overriding the platform's one
+            (e.g. a local mock server, see benchmarks/mock_api.py).
 
     Returns:
-        dict: Headers containing the access token.
+        ApiClient: Client with a pooled HTTP session and an AuthManager (client.auth)
+        that refreshes the access token for the whole session.
     """
 
     # URLs par plateforme
@@ -20,39 +137,43 @@ def login(email, password, platform='EU'):
         "AUS": 'https://sso.beyond-suite.com.au/realms/prod-au/protocol/openid-connect/token',
         "USA": 'https://sso.beyond-suite.co/realms/prod-us/protocol/openid-connect/token',
     }
-    url = url_map.get(platform, url_map["EU"])
+    url = token_url or url_map.get(platform, url_map["EU"])
 
     data = {
-        "client_id": 'app-bm-api',
+        "client_id": CLIENT_ID,
         "grant_type": 'password',
         "username": email,
         "password": password,
     }
 
+    client = ApiClient(base_url=base_url, pool_size=pool_size, max_concurrency=max_concurrency,
+                       max_retries=max_retries, rate_limit=rate_limit)
+
     try:
-        response = requests.post(url, data=data)
+        response = client.post(url, data=data)
     except requests.exceptions.RequestException as e:
-        st.error(f"Erreur de connexion à l'API : {e}")
-        st.stop()
+        messages.error(f"Erreur de connexion à l'API : {e}")
+        messages.stop()
 
     if response.status_code == 401:
-        st.error("Identifiants incorrects. Veuillez réessayer.")
-        st.stop()
+        messages.error("Identifiants incorrects. Veuillez réessayer.")
+        messages.stop()
 
     if response.status_code != 200:
-        st.error(f"Erreur API : {response.status_code} - {response.text}")
-        st.stop()
+        messages.error(f"Erreur API : {response.status_code} - {response.text}")
+        messages.stop()
 
     response_data = response.json()
     access_token = response_data.get("access_token")
 
     if not access_token:
-        st.error("Token non trouvé dans la réponse.")
-        st.stop()
+        messages.error("Token non trouvé dans la réponse.")
+        messages.stop()
 
-    return {
+    client.set_headers({
         'accept': 'application/json',
-        'authorization': f'Bearer {access_token}',
-        'x-auth-request-access-token': access_token,
         'sxd-application': 'beyond-monitoring'
-    }
+    })
+    client.auth = AuthManager(client.session, url, response_data, timeout=client.timeout)
+
+    return client
@@ -0,0 +1,249 @@
+import email.utils
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import Z04_instrumentation as instrumentation
+
+# URL de base de l'API Beyond Monitoring
+API_BASE_URL = 'https://api.beyond-monitoring.com'
+
+# Nombre de connexions conservées ouvertes par hôte (>= nombre de requêtes simultanées)
+DEFAULT_POOL_SIZE = 16
+
+# Délai maximal (en secondes) d'attente d'une réponse de l'API
+DEFAULT_TIMEOUT = 60
+
+# Nouvelles tentatives sur erreurs transitoires (429, 5xx de passerelle, erreurs réseau)
+DEFAULT_MAX_RETRIES = 4
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 0.5   # secondes, doublé à chaque tentative
+BACKOFF_MAX = 30     # secondes
+
+# Erreurs réseau retentées : connexion impossible ou coupée, délai dépassé, corps de réponse interrompu
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate of a client.
+
+    Args:
+        rate (float): Tokens added per second (sustained requests per second).
+        capacity (int, optional): Maximum burst size (defaults to max(1, rate)).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then consumes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after(response):
+    """
+    Returns the delay (seconds) requested by a Retry-After header, or None.
+    """
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def response_bytes(response):
+    """
+    Returns the number of body bytes received for a response (as sent on the wire, before decompression).
+    """
+    try:
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return len(response.content or b'')
+
+
+class ApiClient:
+    """
+    Client for the Beyond Monitoring API sharing one pooled HTTP session.
+
+    All calls reuse warm keep-alive connections instead of opening a new
+    TCP/TLS connection per request. Transient failures (429, 5xx gateway errors,
+    network errors) are retried with exponential backoff and jitter, honoring
+    Retry-After, and an optional token bucket limits the request rate.
+
+    Args:
+        headers (dict): Authentication headers (see B00_login.login).
+        base_url (str): Base URL of the API.
+        pool_size (int): Maximum number of pooled connections per host.
+        timeout (float): Default per-request timeout in seconds.
+        max_concurrency (int, optional): Global cap on requests in flight through this
+            client, body download included, shared by every thread using it (e.g. several
+            projects exported at once).
+        max_retries (int): Number of retries after the first attempt (0 disables retries).
+        rate_limit (float, optional): Maximum sustained requests per second.
+        burst (int, optional): Maximum burst above rate_limit.
+
+    Attributes:
+        auth: Optional object whose headers() method returns up-to-date authorization
+            headers for each request (see B00_login.AuthManager); a 401 response forces
+            one refresh and a new attempt.
+    """
+
+    def __init__(self, headers=None, base_url=API_BASE_URL, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 max_concurrency=None, max_retries=DEFAULT_MAX_RETRIES, rate_limit=None, burst=None):
+        self.base_url = base_url.rstrip('/')
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.auth = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.headers)
+
+    def set_headers(self, headers):
+        """
+        Replaces the authentication headers sent with every request.
+        """
+        for key in self.headers:
+            self.session.headers.pop(key, None)
+        self.headers = dict(headers)
+        self.session.headers.update(self.headers)
+
+    def url(self, path):
+        """
+        Returns the absolute URL for an API path ('/api/...'); absolute URLs are kept as is.
+        """
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, json=None, timeout=None, parse=None, **kwargs):
+        """
+        Sends a request through the pooled session and returns the response.
+
+        Transient errors are retried; the last response is returned when retries are
+        exhausted, and the last network exception is raised if no response was received.
+
+        With a parse callback the body is streamed: a 200 response is handed to parse and
+        the result is stored in response.parsed (other responses are read normally). A body
+        interrupted while it is read is retried like a network error.
+        """
+        auth_retried = False
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self._send(method, path, json, timeout, parse, **kwargs)
+            except TRANSIENT_ERRORS:
+                if attempt >= self.max_retries:
+                    raise
+
+            # Jeton refusé (révoqué ou expiré plus tôt que prévu) : un renouvellement forcé puis un nouvel essai
+            # immédiat, qui passe par la même gestion d'erreurs et ne compte pas comme une nouvelle tentative
+            if response is not None and response.status_code == 401 and self.auth is not None and not auth_retried:
+                auth_retried = True
+                rejected_token = response.request.headers.get('x-auth-request-access-token')
+                self.auth.refresh(force=True, rejected_token=rejected_token)
+                response.close()
+                continue
+
+            if response is not None and (response.status_code not in RETRY_STATUS_CODES
+                                         or attempt >= self.max_retries):
+                return response
+
+            # Attente exponentielle avec gigue, ou délai imposé par le serveur (Retry-After)
+            delay = _retry_after(response)
+            if delay is None:
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            if response is not None:
+                # Libère la connexion d'une réponse abandonnée (indispensable avec stream=True)
+                response.close()
+            time.sleep(min(delay, BACKOFF_MAX))
+            attempt += 1
+
+    @staticmethod
+    def _read_body(response, parse):
+        try:
+            if response.status_code == 200:
+                response.parsed = parse(response)
+            else:
+                response.content  # lecture complète du corps (message d'erreur)
+        finally:
+            response.close()
+            instrumentation.record_bytes(response_bytes(response))
+
+    def _send(self, method, path, json, timeout, parse=None, **kwargs):
+        if self._bucket is not None:
+            self._bucket.acquire()
+        if self._slots is None:
+            return self._exchange(method, path, json, timeout, parse, **kwargs)
+        # Place libérée après la lecture complète du corps, y compris pour une réponse en flux
+        with self._slots:
+            return self._exchange(method, path, json, timeout, parse, **kwargs)
+
+    def _exchange(self, method, path, json, timeout, parse, **kwargs):
+        if parse is None:
+            return self._session_request(method, path, json, timeout, **kwargs)
+        response = self._session_request(method, path, json, timeout, stream=True, **kwargs)
+        self._read_body(response, parse)
+        return response
+
+    def _session_request(self, method, path, json, timeout, **kwargs):
+        if self.auth is not None:
+            kwargs['headers'] = {**self.auth.headers(), **kwargs.get('headers', {})}
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                self.url(path),
+                json=json,
+                timeout=timeout or self.timeout,
+                **kwargs
+            )
+        except requests.exceptions.RequestException:
+            instrumentation.record_request(time.perf_counter() - start)
+            raise
+        # Latence jusqu'aux en-têtes ; le corps d'une réponse en flux est compté après lecture (B02_fetch_engine)
+        nbytes = 0 if kwargs.get('stream') else response_bytes(response)
+        instrumentation.record_request(time.perf_counter() - start, response.status_code, nbytes)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request('POST', path, json=json, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,85 @@
+import concurrent.futures
+import contextvars
+
+import requests
+
+from B00_login import AuthError
+
+# Nombre maximal de requêtes HTTP simultanées vers l'API
+DEFAULT_MAX_WORKERS = 8
+
+
+def _send(client, method, path, json_data, timeout, parse=None):
+    """
+    Sends a single HTTP request and returns the response, or None on network error.
+
+    With a parse callback the body is streamed: successful responses are handed to
+    parse and the result is stored in response.parsed (see ApiClient.request).
+    """
+    try:
+        return client.request(method, path, json=json_data, timeout=timeout, parse=parse)
+    except requests.exceptions.RequestException as e:
+        print(f"Erreur réseau pour {method} {path} : {e}")
+        return None
+    except ValueError as e:
+        print(f"Réponse illisible pour {method} {path} : {e}")
+        return None
+    except AuthError as e:
+        # Session expirée : la requête est comptée en échec sans interrompre les autres
+        print(f"Authentification impossible pour {method} {path} : {e}")
+        return None
+
+
+def fetch_all(client, request_list, max_workers=DEFAULT_MAX_WORKERS, timeout=None, parse=None, on_response=None):
+    """
+    Sends a list of HTTP requests with bounded parallelism.
+
+    Args:
+        client (ApiClient): The API client whose pooled session is used.
+        request_list (list): Tuples (method, path, json_data); json_data may be None.
+        max_workers (int): Maximum number of requests in flight (1 runs sequentially).
+        timeout (float): Per-request timeout in seconds (defaults to the client's timeout).
+        parse (callable): Optional parser applied to each 200 response while its body is
+            streamed (see B14_timeseries_parser); the result is available as response.parsed.
+        on_response (callable): Optional callback on_response(index, response) called in the
+            calling thread as soon as each request completes (in completion order), e.g. to
+            store or display partial results before the whole list is done.
+
+    Returns:
+        list: The responses in the same order as request_list (None for requests
+        that failed before receiving a response).
+
+        Example: [<Response [200]>, None, <Response [404]>]
+    """
+    if not request_list:
+        return []
+
+    workers = max(1, min(int(max_workers), len(request_list)))
+    responses = [None] * len(request_list)
+
+    if workers == 1:
+        for index, (method, path, json_data) in enumerate(request_list):
+            responses[index] = _send(client, method, path, json_data, timeout, parse)
+            if on_response is not None:
+                on_response(index, responses[index])
+        return responses
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # Chaque requête s'exécute dans une copie du contexte de l'appelant (étape en cours, voir Z04_instrumentation)
+        futures = {
+            executor.submit(contextvars.copy_context().run, _send, client, method, path, json_data, timeout, parse): index
+            for index, (method, path, json_data) in enumerate(request_list)
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                # Résultats rangés dans l'ordre des requêtes d'origine
+                responses[index] = future.result()
+                if on_response is not None:
+                    on_response(index, responses[index])
+        except BaseException:
+            # Interruption (ex. nouvelle exécution Streamlit) : les requêtes pas encore envoyées sont annulées
+            for future in futures:
+                future.cancel()
+            raise
+    return responses
@@ -1,5 +1,7 @@
 import streamlit as st
 
+import Z02_messages as messages
+
 def read_projects(file_path):
     """
     Reads projects from a .txt file and returns them as a list of tuples (name, id).
@@ -13,10 +15,10 @@ def read_projects(file_path):
                     name, project_id = line.split(':')
                     projects.append((name.strip(), project_id.strip()))
     except FileNotFoundError:
-        st.error(f"Fichier introuvable : {file_path}")
+        messages.error(f"Fichier introuvable : {file_path}")
         return None
     except Exception as e:
-        st.error(f"Erreur lors de la lecture du fichier : {e}")
+        messages.error(f"Erreur lors de la lecture du fichier : {e}")
         return None
 
     return projects
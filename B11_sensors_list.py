@@ -1,26 +1,40 @@
-import requests
 import streamlit as st
 
+import Z02_messages as messages
+import Z04_instrumentation as instrumentation
+from B17_catalog import search_pages
+
 # 1. Obtenir la liste des capteurs d'un projet
-def get_sensors(project_id, headers):
+@instrumentation.stage('get_sensors', rows=len)
+def get_sensors(project_id, client, catalog=None, force=False):
     """
-    Retrieves the list of sensors for a given project.
+    Retrieves the list of sensors for a given project, page by page.
+
+    The derived datapoints are embedded so that derivedDatapoints_list needs no extra request.
+
+    Args:
+        project_id (str): The project ID.
+        client (ApiClient): The API client.
+        catalog (CatalogCache, optional): Local catalog of the project; the list is read from it
+            while fresh and only downloaded again when the API reports a change.
+        force (bool): Revalidates the local catalog even if it is fresh.
     """
+    path = f'/api/v2/projects/{project_id}/sensors/search'
     json_data = {
-        'with': ['sensorType'],
+        'with': ['sensorType', 'derivedDatapoints'],
     }
 
-    response = requests.post(
-        f'https://api.beyond-monitoring.com/api/v2/projects/{project_id}/sensors/search',
-        headers=headers,
-        json=json_data
-    )
+    if catalog is not None:
+        response, sensors = catalog.load('sensors', client, path, json_data, force=force)
+    else:
+        response, sensors, _ = search_pages(client, path, json_data)
 
-    if response.status_code != 200:
-        st.error(f"Erreur lors de la récupération des capteurs : {response.status_code} - {response.text}")
-        return []
+    if sensors is None:
+        messages.error(f"Erreur lors de la récupération des capteurs : {response.status_code} - {response.text}")
+        # Liste des capteurs indispensable : arrêt (projet en échec en mode sans interface)
+        messages.stop(f"Liste des capteurs indisponible ({response.status_code}).")
 
-    return response.json()
+    return sensors
 
 
 # 2. Extraire les types de capteurs disponibles
@@ -1,19 +1,35 @@
-import requests
 import json
 import pandas as pd
 
 import Z00_get_user_choice
+import Z04_instrumentation as instrumentation
+from B02_fetch_engine import fetch_all, DEFAULT_MAX_WORKERS
+from B14_timeseries_parser import parse_timeseries_response, concat_series, empty_series
+from B15_series_table import SeriesTable, default_label
+from Z01_time_windows import split_time_window, DEFAULT_TIME_CHUNK
+from Z03_resampling import resample_points, layout_points, DEFAULT_RESOLUTION, DEFAULT_AGGREGATION, DEFAULT_LAYOUT
 
 
 # Derived datapoints list
-def derivedDatapoints_list(project_id, headers, grouped_sensors):
+@instrumentation.stage('derivedDatapoints_list',
+                       rows=lambda groups: sum(len(group['derivedDatapoints']) for group in groups))
+def derivedDatapoints_list(project_id, client, grouped_sensors, max_workers=DEFAULT_MAX_WORKERS, sensors=None,
+                           catalog=None):
     """
     Retrieves a list of derived datapoints for each group of sensors.
 
+    When `sensors` (from get_sensors, which embeds 'derivedDatapoints') is given, the
+    datapoints are read from it; only sensors missing that field are fetched, concurrently,
+    with GET /sensors/{id}, unless the project catalog already remembers them.
+
     Args:
         project_id (str): The project ID.
-        headers (dict): Authentication headers.
+        client (ApiClient): The API client.
         grouped_sensors (list): Sensors grouped by type.
+        max_workers (int): Maximum number of concurrent requests.
+        sensors (list, optional): Sensor list returned by get_sensors.
+        catalog (CatalogCache, optional): Local catalog remembering the datapoints of the sensors
+            fetched one by one (see B17_catalog).
 
     Returns:
         list: A list of dictionaries containing sensor types and their derived datapoints.
@@ -23,25 +39,46 @@ def derivedDatapoints_list(project_id, headers, grouped_sensors):
     """
     all_deriveddatapoints = []
 
+    # Données dérivées déjà connues grâce à la liste des capteurs
+    known_datapoints = {
+        sensor['id']: sensor['derivedDatapoints']
+        for sensor in sensors or []
+        if sensor.get('derivedDatapoints') is not None
+    }
+    if catalog is not None:
+        known_datapoints = {**catalog.sensor_datapoints(), **known_datapoints}
+
+    # Détail des capteurs restants, récupérés en parallèle pour tous les types à la fois
+    to_fetch = [
+        sensor_ID
+        for group in grouped_sensors
+        for sensor_ID in group['sensors'].keys()
+        if sensor_ID not in known_datapoints
+    ]
+    responses = fetch_all(
+        client,
+        [('GET', f'/api/v2/projects/{project_id}/sensors/{sensor_ID}', None) for sensor_ID in to_fetch],
+        max_workers=max_workers
+    )
+    fetched = {}
+    for sensor_ID, response in zip(to_fetch, responses):
+        if response is None or response.status_code != 200:
+            continue
+        fetched[sensor_ID] = response.json().get('derivedDatapoints', [])
+    known_datapoints.update(fetched)
+    if catalog is not None:
+        catalog.store_sensor_datapoints(fetched)
+
     for group in grouped_sensors:
         sensor_type = group['type']
-        sensor_ids = list(group['sensors'].keys())
 
         unique_deriveddatapoints = []
+        seen_names = set()
 
-        for sensor_ID in sensor_ids:
-            response = requests.get(
-                f'https://api.beyond-monitoring.com/api/v2/projects/{project_id}/sensors/{sensor_ID}',
-                headers=headers
-            )
-
-            if response.status_code != 200:
-                continue
-
-            sensor_details = response.json()
-
-            for dp in sensor_details.get('derivedDatapoints', []):
-                if dp['name'] not in [d['name'] for d in unique_deriveddatapoints]:
+        for sensor_ID in group['sensors'].keys():
+            for dp in known_datapoints.get(sensor_ID, []):
+                if dp['name'] not in seen_names:
+                    seen_names.add(dp['name'])
                     unique_deriveddatapoints.append({
                         'name': dp['name'],
                         'code': dp['code']
@@ -49,13 +86,13 @@ def derivedDatapoints_list(project_id, headers, grouped_sensors):
 
 
         if sensor_type == 'Tiltmètres':
-            if 'Temp' not in [d['name'] for d in unique_deriveddatapoints]:
+            if 'Temp' not in seen_names:
                 unique_deriveddatapoints.append({'name': 'Température', 'code': 'Temp'})
         if sensor_type == 'Stations météo':
-            if 'PRECIPITATION_1H' not in [d['name'] for d in unique_deriveddatapoints]:
+            if 'PRECIPITATION_1H' not in seen_names:
                 unique_deriveddatapoints.append({'name': 'Précipitations_1h', 'code': 'PRECIPITATION_1H'})
         if sensor_type == 'Piezomètres':
-            if 'Hauteur_eau' not in [d['name'] for d in unique_deriveddatapoints]:
+            if 'Hauteur_eau' not in seen_names:
                 unique_deriveddatapoints.append({'name': 'Hauteur_eau', 'code': 'Hauteur_eau'})
 
         unique_deriveddatapoints = sorted(unique_deriveddatapoints, key=lambda d: d['name'])
@@ -104,111 +141,241 @@ def select_derived_datapoints(all_deriveddatapoints, project_key=None):
 
 
 
+# Nombre maximal de séries (capteur, donnée) regroupées dans un appel timeseriesdata/search
+DEFAULT_BATCH_SIZE = 50
+
+
+def _resolve_datapoint_type(sensor_type, datapoint, datapoint_type):
+    """
+    Returns the datapoint type to request for a datapoint of a given sensor type.
+    """
+    # Configuration spéciale pour les 'tiltmeters', 'weather_stations' et 'piezometers'
+    if sensor_type == 'Tiltmètres' and datapoint['name'] == 'Température':
+        return "acquired"
+    if sensor_type == 'Stations météo' and datapoint['name'] == 'Précipitations_1h':
+        return "acquired"
+    if sensor_type == 'Piezomètres' and datapoint['name'] == 'Hauteur_eau':
+        return "acquired"
+    return datapoint_type
+
+
+def _chunked(items, size):
+    """
+    Splits a list into consecutive chunks of at most `size` elements.
+    """
+    size = max(1, int(size))
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# Plan the (sensor, datapoint) series to request
+def plan_series(grouped_sensors, selected_data, datapoint_type="derived"):
+    """
+    Lists the (sensor, datapoint) series to request, pairing each sensor only with the
+    datapoints selected for its own sensor type.
+
+    Args:
+        grouped_sensors (list): A list of sensors grouped by type.
+        selected_data (list): A list of selected datapoints grouped by sensor type.
+        datapoint_type (str): The default type of datapoints to retrieve.
+
+    Returns:
+        list: Tuples (sensor_type, sensor_id, datapoint_code, datapoint_type).
+
+        Example: [('crack_meters', '64cba566841fbfae194e3e43', 'DX', 'derived')]
+    """
+    # Index type de capteur -> données sélectionnées (codes dédoublonnés)
+    datapoints_by_type = {}
+    for selected in selected_data:
+        datapoints = datapoints_by_type.setdefault(selected['sensor_type'], {})
+        for datapoint in selected['selectedDerivedDatapoints']:
+            datapoints.setdefault(datapoint['code'], datapoint)
+
+    series = []
+    for group in grouped_sensors:
+        sensor_type = group['type']
+        datapoints = [
+            (code, _resolve_datapoint_type(sensor_type, datapoint, datapoint_type))
+            for code, datapoint in datapoints_by_type.get(sensor_type, {}).items()
+        ]
+
+        for sensor_id in group['sensors'].keys():
+            for code, current_datapoint_type in datapoints:
+                series.append((sensor_type, sensor_id, code, current_datapoint_type))
+
+    return series
+
+
 # Extract data for sensors
-def extract_data(project_id, headers, grouped_sensors, start_time, end_time, selected_data, datapoint_type="derived"):
+@instrumentation.stage('extract_data', rows=lambda table: table.n_points)
+def extract_data(project_id, client, grouped_sensors, start_time, end_time, selected_data, datapoint_type="derived",
+                 batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS, cache=None,
+                 time_chunk=DEFAULT_TIME_CHUNK, failures=None, progress=None):
     """
     Extracts sensor data for the specified time range and selected datapoints.
 
+    Several (sensor, datapoint) series are packed into each timeseriesdata/search call, then the
+    combined response is split back per sensor and datapoint. With a local cache, only the parts
+    of the time range not stored yet are downloaded, and the full range is read back from the cache.
+    Long ranges are split into sub-windows (time_chunk) fetched in parallel and stitched back in order.
+    Responses are parsed while they are streamed, keeping only timestamps and values per series
+    (see B14_timeseries_parser), and the series are gathered in a columnar SeriesTable.
+    Each response is handled (and stored in the local cache) as soon as it arrives, so an
+    interrupted extraction keeps the windows already downloaded.
+
     Args:
         project_id (str): The project ID.
-        headers (dict): Authentication headers.
+        client (ApiClient): The API client.
         grouped_sensors (list): A list of sensors grouped by type.
         start_time (str): The start time for data extraction (ISO 8601 format).
         end_time (str): The end time for data extraction (ISO 8601 format).
         selected_data (list): A list of selected datapoints grouped by sensor type.
         datapoint_type (str): The type of datapoints to retrieve (default is "derived").
+        batch_size (int): Maximum number of series per request (1 sends one request per series).
+        max_workers (int): Maximum number of concurrent requests.
+        cache (TimeseriesCache, optional): Local cache of already downloaded points.
+        time_chunk: Sub-window size ('month', 'week', 'day', a timedelta, or None for a single window).
+        failures (list, optional): Receives one dict per (sensor, datapoint, window) whose request
+            still failed after the client's retries, e.g. {'sensor_type': 'crack_meters',
+            'sensor': 'FISS_2D_R+3_Paris', 'datapoint': 'DX', 'start': '...', 'end': '...', 'status': 503}.
+        progress (callable, optional): Called as progress(done, total) in the calling thread after
+            each request completes (total is 0 when everything comes from the local cache).
 
     Returns:
-        dict: A dictionary containing the extracted sensor data grouped by type and sensor ID.
-
-        Example: {'crack_meters': {'64cba566841fbfae194e3e43': [{'64cba566841fbfae194e3e43': {'datapointTypes': {'DX': []}}},
-        {'64cba566841fbfae194e3e43': {'datapointTypes': {'DY': []}}}],
-        '651bdf3ae3cf23198ddd8698': [{'651bdf3ae3cf23198ddd8698': {'datapointTypes': {'DX': [{'v': 3.4710649999999994,
-                'rv': -22.118935,
-                'dv': 3.4710649999999994,
-                't': '2025-01-12T00:00:00.000Z',
-                'p': None,
-                'e': 0}]}}},
-        {'651bdf3ae3cf23198ddd8698': {'datapointTypes': {'DY': [{'v': -0.6156830000000006,
-                'rv': 27.924317,
-                'dv': -0.6156830000000006,
-                't': '2025-01-12T00:00:00.000Z',
-                'p': None,
-                'e': 0}]}}}], [...]
+        SeriesTable: One series per (sensor, datapoint) with group = sensor type and name = sensor name
+        (see B15_series_table).
 
-    """
-    sensor_data = {}
+        Example: table.series[0] == {'group': 'crack_meters', 'entity_id': '651bdf3ae3cf23198ddd8698',
+                 'name': 'FISS_2D_R+3_Paris', 'datapoint': 'DX', 'datapoint_type': 'derived'},
+                 table.values[0] == array([3.471065, ...])
 
-    for group in grouped_sensors:
-        sensor_type = group['type']
-        sensor_ids = list(group['sensors'].keys())
-
-        sensor_data[sensor_type] = {}
-
-        for sensor_id in sensor_ids:
-            all_data = []  # On va stocker chaque réponse JSON ici
-
-            for selected in selected_data:
-                for datapoint in selected['selectedDerivedDatapoints']:
-
-                    # Configuration spéciale pour les 'tiltmeters' et 'weather_stations'
-                    if sensor_type == 'Tiltmètres' and datapoint['name'] == 'Température':
-                        current_datapoint_type = "acquired"
-                    elif sensor_type == 'Stations météo' and datapoint['name'] == 'Précipitations_1h':
-                        current_datapoint_type = "acquired"
-                    elif sensor_type == 'Piezomètres' and datapoint['name'] == 'Hauteur_eau':
-                        current_datapoint_type = "acquired"
-                    else:
-                        current_datapoint_type = datapoint_type
-
-                    json_data = {
-                        'filter': {
-                            'startTime': start_time,
-                            'endTime': end_time,
-                            'datapointTypes': [
-                                {
-                                    'entityId': sensor_id,
-                                    'datapoint': datapoint['code'],
-                                    'datapointType': current_datapoint_type
-                                },
-                            ],
-                            'entityKind': 'Sensor',
-                            'onlyLatest': False,
-                            'errorStatus': [0, -7, -5],
-                            'skipNullValues': None,
-                            'limitLatest': None
-                        },
+    """
+    table = SeriesTable()
+    series = plan_series(grouped_sensors, selected_data, datapoint_type)
+
+    # Fenêtres à télécharger par série (seulement les trous du cache local s'il est fourni)
+    series_by_window = {}
+    for current in series:
+        _, sensor_id, code, current_datapoint_type = current
+        if cache is not None:
+            windows = cache.missing_windows(sensor_id, code, current_datapoint_type, start_time, end_time)
+        else:
+            windows = [(start_time, end_time)]
+        for window_start, window_end in windows:
+            for window in split_time_window(window_start, window_end, time_chunk):
+                series_by_window.setdefault(window, []).append(current)
+
+    batches = [
+        (window, batch)
+        for window, window_series in series_by_window.items()
+        for batch in _chunked(window_series, batch_size)
+    ]
+    request_list = []
+
+    for (window_start, window_end), batch in batches:
+        json_data = {
+            'filter': {
+                'startTime': window_start,
+                'endTime': window_end,
+                'datapointTypes': [
+                    {
+                        'entityId': sensor_id,
+                        'datapoint': code,
+                        'datapointType': current_datapoint_type
                     }
-
-                    response = requests.post(
-                        f'https://api.beyond-monitoring.com/api/projects/{project_id}/timeseriesdata/search',
-                        headers=headers,
-                        json=json_data
+                    for _, sensor_id, code, current_datapoint_type in batch
+                ],
+                'entityKind': 'Sensor',
+                'onlyLatest': False,
+                'errorStatus': [0, -7, -5],
+                'skipNullValues': None,
+                'limitLatest': None
+            },
+        }
+        request_list.append((
+            'POST',
+            f'/api/projects/{project_id}/timeseriesdata/search',
+            json_data
+        ))
+
+    sensor_names = {sensor_id: name for group in grouped_sensors for sensor_id, name in group['sensors'].items()}
+
+    fetched = {}  # série -> [(début de fenêtre, série compacte)]
+    done = [0]
+
+    def handle_response(index, response):
+        (window_start, window_end), batch = batches[index]
+        done[0] += 1
+        if response is None or response.status_code != 200:
+            # Échec définitif (après les nouvelles tentatives du client) : on le signale
+            if failures is not None:
+                status = response.status_code if response is not None else 'réseau'
+                failures.extend(
+                    {
+                        'sensor_type': sensor_type,
+                        'sensor': sensor_names.get(sensor_id, sensor_id),
+                        'datapoint': code,
+                        'start': window_start,
+                        'end': window_end,
+                        'status': status,
+                    }
+                    for sensor_type, sensor_id, code, _ in batch
+                )
+        else:
+            parsed = response.parsed
+            # Réponse traitée, plus besoin de la garder en mémoire
+            response.parsed = None
+
+            # Redécoupage de la réponse groupée : une entrée par (capteur, donnée)
+            for sensor_type, sensor_id, code, current_datapoint_type in batch:
+                datapoints = parsed.get(sensor_id, {})
+                if cache is not None:
+                    cache.store(sensor_id, code, current_datapoint_type, window_start, window_end,
+                                datapoints.get(code) or empty_series())
+                elif code in datapoints:
+                    fetched.setdefault((sensor_type, sensor_id, code, current_datapoint_type), []).append(
+                        (window_start, datapoints[code])
                     )
 
-                    if response.status_code == 200:
-                        raw_data = response.json()
-                        sensor_specific_data = raw_data.get('data', {})
-                        if sensor_specific_data:
-                            # <-- On fait un append au lieu de extend
-                            all_data.append(sensor_specific_data)
+        if progress is not None:
+            progress(done[0], len(request_list))
+
+    if progress is not None and not request_list:
+        progress(0, 0)
+    fetch_all(client, request_list, max_workers=max_workers, parse=parse_timeseries_response,
+              on_response=handle_response)
 
-            sensor_data[sensor_type][sensor_id] = all_data
+    # Recollage des sous-fenêtres dans l'ordre chronologique
+    for (sensor_type, sensor_id, code, current_datapoint_type), chunks in fetched.items():
+        points = concat_series(chunk for _, chunk in sorted(chunks, key=lambda c: c[0]))
+        table.add(sensor_type, sensor_id, sensor_names.get(sensor_id, sensor_id), code, points, current_datapoint_type)
 
-    return sensor_data
+    if cache is not None:
+        for sensor_type, sensor_id, code, current_datapoint_type in series:
+            points = cache.load(sensor_id, code, current_datapoint_type, start_time, end_time)
+            table.add(sensor_type, sensor_id, sensor_names.get(sensor_id, sensor_id), code, points, current_datapoint_type)
+
+    return table
 
 
 
 
 
 # Create DataFrames by sensor type
-def create_dataframes_by_type(sensor_data, grouped_sensors):
+@instrumentation.stage('create_dataframes_by_type', rows=instrumentation.frame_rows)
+def create_dataframes_by_type(sensor_data, grouped_sensors, resolution=DEFAULT_RESOLUTION,
+                              aggregation=DEFAULT_AGGREGATION, layout=DEFAULT_LAYOUT):
     """
     Creates pandas DataFrames for each sensor type based on the provided data.
 
     Args:
-        sensor_data (dict): A dictionary containing sensor data grouped by type and sensor IDs.
+        sensor_data (SeriesTable): The series returned by extract_data.
         grouped_sensors (list): A list of grouped sensors by type.
+        resolution (str): Output period (pandas offset alias, default hourly).
+        aggregation (str): 'sample' (point at the start of each period), 'mean', 'first',
+            'last', 'min' or 'max' (see Z03_resampling.resample_points).
+        layout (str): 'wide' (one sparse column per sensor-datapoint) or 'long'
+            (columns Timestamp, Sensor, Datatype, Value, no pivot).
 
     Returns:
         dict: A dictionary where keys are sensor types and values are DataFrames.
@@ -224,56 +391,27 @@ def create_dataframes_by_type(sensor_data, grouped_sensors):
 
     for group in grouped_sensors:
         sensor_type = group['type']
-        sensor_ids = group['sensors'].keys()
-
-        data_for_this_type = sensor_data[sensor_type]
-
-        rows = []
-        for sensor_id in sensor_ids:
-            sensor_list = data_for_this_type.get(sensor_id, [])
 
-            for sensor_dict in sensor_list:
-                if sensor_id not in sensor_dict:
-                    continue
-                datapoint_types = sensor_dict[sensor_id].get('datapointTypes', {})
+        # Colonnes déjà typées : pas de conversion point par point
+        points = sensor_data.to_long(sensor_type)
 
-                for datatype, datapoints in datapoint_types.items():
-                    for point in datapoints:
-                        rows.append({
-                            'Identifier': sensor_id,
-                            'Datatype': datatype,
-                            'Value': point['v'],
-                            'Timestamp': pd.to_datetime(point['t'])
-                        })
-
-        if not rows:
+        if points.empty:
             df_dict[sensor_type] = pd.DataFrame()
             continue
 
-        df = pd.DataFrame(rows)
-
-        # Map identifiers to their names
-        df['Identifier'] = df['Identifier'].map(group['sensors'])
-
-        # Filter to keep only timestamps where minutes are zero
-        df = df[df['Timestamp'].dt.minute == 0]
-        df['Timestamp'] = df['Timestamp'].dt.strftime('%Y-%m-%d %H:%M')
-        df = df.reset_index(drop=True)
-
-        # Create a new ID column combining Identifier and Datatype
-        df['ID'] = df['Identifier'] + '-' + df['Datatype']
-
-        # Keep only necessary columns
-        df = df[['Timestamp', 'ID', 'Value']]
+        # Mise à la résolution demandée (par défaut : points à hh:00)
+        df = resample_points(points['Timestamp'], points['ID'], points['Value'], 'ID', resolution, aggregation)
 
         # Check for duplicates and handle them
         if df.duplicated(subset=['Timestamp', 'ID']).any():
             print(f"Aggregation des doublons pour le type de capteur '{sensor_type}'.")
             df = df.groupby(['Timestamp', 'ID'], as_index=False).agg({'Value': 'mean'})
 
-        # Perform the pivot operation
-        df_pivot = df.pivot(index='Timestamp', columns='ID', values='Value').reset_index()
-
-        df_dict[sensor_type] = df_pivot
+        # Tableau large (pivot creux) ou long (une ligne par point)
+        labels = {
+            default_label(meta): {'Sensor': meta['name'], 'Datatype': meta['datapoint']}
+            for meta in sensor_data.series if meta['group'] == sensor_type
+        }
+        df_dict[sensor_type] = layout_points(df, 'ID', layout, labels)
 
     return df_dict
@@ -0,0 +1,126 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+from config_handler import CACHE_DIR
+from B14_timeseries_parser import NAN, empty_series
+from Z01_time_windows import parse_time, format_time, merge_intervals, missing_intervals
+
+# Les données plus récentes que ce délai peuvent encore évoluer : elles sont
+# stockées mais leur fenêtre n'est pas marquée comme couverte (re-téléchargée)
+STABLE_DELAY = datetime.timedelta(days=2)
+
+
+def stable_cutoff(now=None):
+    """
+    Returns the end of the stable data: STABLE_DELAY before now, rounded down to midnight UTC.
+
+    The rounding gives every series stored during an extraction (and during the same day) the
+    same covered end, so on the next run they share their missing window and stay batched
+    together in timeseriesdata/search calls.
+    """
+    now = parse_time(now) if now is not None else datetime.datetime.now(datetime.timezone.utc)
+    return (now - STABLE_DELAY).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class TimeseriesCache:
+    """
+    Persistent SQLite cache of timeseries points for one project.
+
+    For each series (entity, datapoint, datapoint type) the cache stores the points
+    and the time ranges already downloaded, so that only the missing sub-intervals
+    of a requested window have to be fetched from timeseriesdata/search.
+
+    Args:
+        project_id (str): The project ID (one database file per project).
+        cache_dir (str): Folder holding the database files.
+        now (datetime, optional): Time of the extraction, fixing the end of the stable data
+            (see stable_cutoff); defaults to the creation time of the cache.
+    """
+
+    def __init__(self, project_id, cache_dir=CACHE_DIR, now=None):
+        self.stable_until = stable_cutoff(now)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{project_id}.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS points ("
+                "entity_id TEXT, datapoint TEXT, datapoint_type TEXT, t TEXT, v REAL, "
+                "PRIMARY KEY (entity_id, datapoint, datapoint_type, t))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "entity_id TEXT, datapoint TEXT, datapoint_type TEXT, start_time TEXT, end_time TEXT)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS coverage_series ON coverage (entity_id, datapoint, datapoint_type)"
+            )
+
+    def _covered(self, series):
+        rows = self._conn.execute(
+            "SELECT start_time, end_time FROM coverage WHERE entity_id = ? AND datapoint = ? AND datapoint_type = ?",
+            series
+        ).fetchall()
+        return [(parse_time(start), parse_time(end)) for start, end in rows]
+
+    def missing_windows(self, entity_id, datapoint, datapoint_type, start_time, end_time):
+        """
+        Returns the (start_time, end_time) sub-windows not yet stored for a series.
+
+        Example: [('2025-01-20T00:00:00.000Z', '2025-01-31T23:59:59.000Z')]
+        """
+        with self._lock:
+            covered = self._covered((entity_id, datapoint, datapoint_type))
+        missing = missing_intervals(parse_time(start_time), parse_time(end_time), covered)
+        return [(format_time(start), format_time(end)) for start, end in missing]
+
+    def store(self, entity_id, datapoint, datapoint_type, start_time, end_time, points):
+        """
+        Stores the points downloaded for a series over [start_time, end_time].
+
+        points is a compact series {'t': [...], 'v': array('d')} (NaN values are stored as NULL).
+        """
+        series = (entity_id, datapoint, datapoint_type)
+        start = parse_time(start_time)
+        end = min(parse_time(end_time), self.stable_until)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?)",
+                [series + (t, None if v != v else v) for t, v in zip(points['t'], points['v'])]
+            )
+
+            if start < end:
+                covered = merge_intervals(self._covered(series) + [(start, end)])
+                self._conn.execute(
+                    "DELETE FROM coverage WHERE entity_id = ? AND datapoint = ? AND datapoint_type = ?",
+                    series
+                )
+                self._conn.executemany(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?, ?)",
+                    [series + (format_time(s), format_time(e)) for s, e in covered]
+                )
+
+    def load(self, entity_id, datapoint, datapoint_type, start_time, end_time):
+        """
+        Returns the stored points of a series within [start_time, end_time], ordered by time.
+
+        Example: {'t': ['2025-01-12T00:00:00.000Z'], 'v': array('d', [3.471065])}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t, v FROM points WHERE entity_id = ? AND datapoint = ? AND datapoint_type = ? "
+                "AND t >= ? AND t <= ? ORDER BY t",
+                (entity_id, datapoint, datapoint_type, format_time(start_time), format_time(end_time))
+            ).fetchall()
+        series = empty_series()
+        for t, v in rows:
+            series['t'].append(t)
+            series['v'].append(NAN if v is None else v)
+        return series
+
+    def close(self):
+        self._conn.close()
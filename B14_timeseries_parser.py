@@ -0,0 +1,151 @@
+"""
+Compact parsing of timeseriesdata/search responses.
+
+Only the timestamp ('t') and value ('v') of each point are kept, as a list of
+ISO strings and an array('d') of floats (NaN for null values) per series:
+
+    {entity_id: {datapoint_code: {'t': ['2025-01-12T00:00:00.000Z', ...], 'v': array('d', [3.47, ...])}}}
+
+With ijson installed the body is parsed incrementally while it is streamed, so
+the full JSON document never exists in memory; otherwise the body is decoded
+with orjson (if installed) or json and converted immediately.
+"""
+import array
+import json
+import math
+
+import requests
+import urllib3
+
+try:
+    import ijson
+except ImportError:  # dépendance optionnelle : analyse non incrémentale
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle : décodeur JSON plus rapide
+    orjson = None
+
+NAN = math.nan
+
+
+def empty_series():
+    """
+    Returns an empty compact series.
+    """
+    return {'t': [], 'v': array.array('d')}
+
+
+def series_from_points(points):
+    """
+    Converts a list of raw points ({'v', 'rv', 'dv', 't', 'p', 'e'}) into a compact series.
+    """
+    return {
+        't': [point['t'] for point in points],
+        'v': array.array('d', [NAN if point['v'] is None else point['v'] for point in points]),
+    }
+
+
+def concat_series(series_list):
+    """
+    Concatenates compact series in the given order.
+    """
+    result = empty_series()
+    for series in series_list:
+        result['t'].extend(series['t'])
+        result['v'].extend(series['v'])
+    return result
+
+
+def _from_document(document):
+    data = (document or {}).get('data', {}) or {}
+    if isinstance(data.get('datapointTypes'), dict):
+        # Réponse non indexée par entité
+        data = {None: data}
+    return {
+        entity_id: {
+            code: series_from_points(points or [])
+            for code, points in (entity or {}).get('datapointTypes', {}).items()
+        }
+        for entity_id, entity in data.items()
+    }
+
+
+def _from_stream(fp):
+    """
+    Incremental parser: walks the JSON events and appends t/v straight into the arrays.
+
+    Path of a point field: data -> entity_id -> 'datapointTypes' -> code -> [item] -> field
+    (or data -> 'datapointTypes' -> code -> [item] -> field when the response is not keyed by entity).
+    """
+    result = {}
+    keys = []         # clé courante de chaque niveau imbriqué ('[]' pour un tableau)
+    series = None     # série en cours de remplissage
+    point_depth = 0   # profondeur des champs d'un point de la série en cours
+    t = None
+    v = NAN
+
+    for event, value in ijson.basic_parse(fp, use_float=True):
+        if event == 'map_key':
+            keys[-1] = value
+        elif event == 'start_map':
+            keys.append(None)
+        elif event == 'end_map':
+            if series is not None and len(keys) == point_depth:
+                series['t'].append(t)
+                series['v'].append(v)
+                t, v = None, NAN
+            keys.pop()
+        elif event == 'start_array':
+            if series is None and keys and keys[0] == 'data':
+                if len(keys) == 4 and keys[2] == 'datapointTypes':
+                    series = result.setdefault(keys[1], {}).setdefault(keys[3], empty_series())
+                elif len(keys) == 3 and keys[1] == 'datapointTypes':
+                    series = result.setdefault(None, {}).setdefault(keys[2], empty_series())
+                point_depth = len(keys) + 2
+            keys.append('[]')
+        elif event == 'end_array':
+            if series is not None and len(keys) == point_depth - 1:
+                series = None
+            keys.pop()
+        elif series is not None and len(keys) == point_depth:
+            if keys[-1] == 't':
+                t = value
+            elif keys[-1] == 'v':
+                v = NAN if value is None else float(value)
+
+    return result
+
+
+def parse_timeseries_response(response):
+    """
+    Parses a timeseriesdata/search response into compact series.
+
+    Args:
+        response (requests.Response): A 200 response, ideally requested with stream=True.
+
+    Returns:
+        dict: {entity_id: {datapoint_code: {'t': list, 'v': array('d')}}} (entity_id is None
+        when the response is not keyed by entity).
+
+    Raises:
+        ValueError: If the body is not valid JSON.
+        requests.exceptions.RequestException: If the body is interrupted while it is streamed
+            (ReadTimeout, or ChunkedEncodingError for a dropped connection), as requests does.
+    """
+    if ijson is not None and not response._content_consumed:
+        response.raw.decode_content = True
+        try:
+            return _from_stream(response.raw)
+        except ijson.JSONError as e:
+            raise ValueError(f"Réponse JSON invalide : {e}") from e
+        # Flux urllib3 lu directement : ses erreurs sont converties comme dans Response.iter_content
+        except urllib3.exceptions.ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e) from e
+        except urllib3.exceptions.HTTPError as e:
+            raise requests.exceptions.ChunkedEncodingError(e) from e
+
+    if orjson is not None:
+        return _from_document(orjson.loads(response.content))
+    return _from_document(json.loads(response.content))
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+
+def _parse_timestamps(timestamps):
+    """
+    Converts ISO 8601 strings (or datetimes) into naive UTC datetime64[ns] values.
+    """
+    if len(timestamps) == 0:
+        return np.empty(0, dtype='datetime64[ns]')
+    parsed = pd.to_datetime(timestamps, utc=True, format='ISO8601')
+    return parsed.tz_convert(None).as_unit('ns').to_numpy()
+
+
+def default_label(meta):
+    """
+    Column label of a series: 'name-datapoint' (e.g. 'FISS_2D_R+3_Paris-DX').
+    """
+    return f"{meta['name']}-{meta['datapoint']}"
+
+
+class SeriesTable:
+    """
+    Columnar container of extracted timeseries, shared by the sensor and asset paths.
+
+    Each series is described once by a metadata dict (group, entity_id, name, datapoint,
+    datapoint_type) and owns two numpy arrays of the same length: UTC timestamps
+    (datetime64[ns]) and values (float64, NaN for null values).
+
+    Example:
+        table = SeriesTable()
+        table.add('crack_meters', '64cba566841fbfae194e3e43', 'FISS_2D_R+3_Paris', 'DX',
+                  {'t': ['2025-01-12T00:00:00.000Z'], 'v': array('d', [3.471065])})
+        table.series  # [{'group': 'crack_meters', 'entity_id': '64cba566841fbfae194e3e43',
+                      #   'name': 'FISS_2D_R+3_Paris', 'datapoint': 'DX', 'datapoint_type': 'derived'}]
+    """
+
+    def __init__(self):
+        self.series = []       # métadonnées, une entrée par série
+        self.timestamps = []   # un tableau datetime64[ns] par série
+        self.values = []       # un tableau float64 par série
+
+    def add(self, group, entity_id, name, datapoint, series, datapoint_type='derived'):
+        """
+        Appends a series given in the compact {'t', 'v'} form (see B14_timeseries_parser).
+        """
+        timestamps = _parse_timestamps(series['t'])
+        values = np.array(series['v'], dtype=np.float64)
+        if len(timestamps) != len(values):
+            raise ValueError(f"Série {name}-{datapoint} : {len(timestamps)} horodatages pour {len(values)} valeurs")
+
+        self.series.append({
+            'group': group,
+            'entity_id': entity_id,
+            'name': name,
+            'datapoint': datapoint,
+            'datapoint_type': datapoint_type,
+        })
+        self.timestamps.append(timestamps)
+        self.values.append(values)
+
+    def __len__(self):
+        return len(self.series)
+
+    def groups(self):
+        """
+        Returns the distinct groups (sensor types, 'Asset') in insertion order.
+        """
+        return list(dict.fromkeys(meta['group'] for meta in self.series))
+
+    def keys(self):
+        """
+        Returns the set of (entity_id, datapoint) pairs present in the table.
+        """
+        return {(meta['entity_id'], meta['datapoint']) for meta in self.series}
+
+    @property
+    def n_points(self):
+        return sum(len(values) for values in self.values)
+
+    @property
+    def nbytes(self):
+        """
+        Size in bytes of the timestamp and value arrays.
+        """
+        return sum(t.nbytes + v.nbytes for t, v in zip(self.timestamps, self.values))
+
+    def to_long(self, group=None, label=default_label, key_column='ID'):
+        """
+        Concatenates the series into a long DataFrame.
+
+        Args:
+            group (str, optional): Only keep the series of this group.
+            label (callable): Builds the key of a series from its metadata.
+            key_column (str): Name of the key column.
+
+        Returns:
+            pd.DataFrame: Columns Timestamp (UTC), key_column, Value.
+
+            Example:                   Timestamp                 ID     Value
+                     0 2025-01-12 00:00:00+00:00  FISS_2D_R+3_Paris-DX  3.471065
+        """
+        selected = [i for i, meta in enumerate(self.series) if group is None or meta['group'] == group]
+        labels = np.array([label(self.series[i]) for i in selected], dtype=object)
+        lengths = np.array([len(self.values[i]) for i in selected], dtype=np.int64)
+
+        if not selected or not lengths.sum():
+            timestamps = np.empty(0, dtype='datetime64[ns]')
+            values = np.empty(0, dtype=np.float64)
+        else:
+            timestamps = np.concatenate([self.timestamps[i] for i in selected])
+            values = np.concatenate([self.values[i] for i in selected])
+
+        return pd.DataFrame({
+            'Timestamp': pd.Series(timestamps).dt.tz_localize('UTC'),
+            key_column: np.repeat(labels, lengths),
+            'Value': values,
+        })
@@ -0,0 +1,162 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import Z04_instrumentation as instrumentation
+from B02_fetch_engine import fetch_all, DEFAULT_MAX_WORKERS
+from B12_sensor_informations import plan_series, DEFAULT_BATCH_SIZE
+from B14_timeseries_parser import parse_timeseries_response
+from Z01_time_windows import format_time
+from Z03_resampling import TIMESTAMP_FORMAT
+
+# Période remontée pour chercher la dernière valeur : un capteur muet depuis plus longtemps apparaît sans valeur
+SNAPSHOT_LOOKBACK = datetime.timedelta(days=365)
+
+# Nom de la feuille / du fichier du tableau des dernières valeurs
+SNAPSHOT_SHEET = "latest_values"
+
+SNAPSHOT_COLUMNS = ['Type', 'Sensor', 'Datatype', 'Timestamp', 'Value']
+
+
+@instrumentation.stage('latest_values', rows=len)
+def latest_values(project_id, client, series, entity_kind='Sensor', limit=1, start_time=None, end_time=None,
+                  batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS, failures=None):
+    """
+    Fetches the latest value(s) of many series with the API's onlyLatest/limitLatest options.
+
+    Args:
+        project_id (str): The project ID.
+        client (ApiClient): The API client.
+        series (list): Dicts {'group', 'entity_id', 'name', 'datapoint', 'datapoint_type'}
+            (same metadata as B15_series_table.SeriesTable).
+        entity_kind (str): 'Sensor' or 'Asset'.
+        limit (int): Number of latest points per series.
+        start_time (str, optional): Oldest point considered (default: now - SNAPSHOT_LOOKBACK).
+        end_time (str, optional): Most recent point considered (default: now).
+        batch_size (int): Maximum number of series per request.
+        max_workers (int): Maximum number of concurrent requests.
+        failures (list, optional): Receives one dict per series whose request failed
+            (same format as B12_sensor_informations.extract_data).
+
+    Returns:
+        pd.DataFrame: Columns Type, Sensor, Datatype, Timestamp, Value, most recent first for
+        each series; series without any point in the period keep one row with empty
+        Timestamp and Value.
+
+        Example:            Type             Sensor Datatype         Timestamp     Value
+                 0  crack_meters  FISS_2D_R+3_Paris       DX  2025-01-12 00:00  3.471065
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start_time = start_time or format_time(now - SNAPSHOT_LOOKBACK)
+    end_time = end_time or format_time(now)
+
+    batches = [series[i:i + max(1, int(batch_size))] for i in range(0, len(series), max(1, int(batch_size)))]
+    request_list = [
+        (
+            'POST',
+            f'/api/projects/{project_id}/timeseriesdata/search',
+            {
+                'filter': {
+                    'startTime': start_time,
+                    'endTime': end_time,
+                    'datapointTypes': [
+                        {
+                            'entityId': meta['entity_id'],
+                            'datapoint': meta['datapoint'],
+                            'datapointType': meta['datapoint_type']
+                        }
+                        for meta in batch
+                    ],
+                    'entityKind': entity_kind,
+                    'onlyLatest': True,
+                    'errorStatus': [0, -7, -5],
+                    'skipNullValues': True,
+                    'limitLatest': limit
+                },
+            }
+        )
+        for batch in batches
+    ]
+
+    responses = fetch_all(client, request_list, max_workers=max_workers, parse=parse_timeseries_response)
+
+    types, names, datapoints, timestamps, values = [], [], [], [], []
+    for batch, response in zip(batches, responses):
+        if response is None or response.status_code != 200:
+            if failures is not None:
+                status = response.status_code if response is not None else 'réseau'
+                failures.extend(
+                    {
+                        'sensor_type': meta['group'],
+                        'sensor': meta['name'],
+                        'datapoint': meta['datapoint'],
+                        'start': start_time,
+                        'end': end_time,
+                        'status': status,
+                    }
+                    for meta in batch
+                )
+            continue
+
+        parsed = response.parsed
+        single_entity = len({meta['entity_id'] for meta in batch}) == 1
+        for meta in batch:
+            # Réponse non indexée par entité possible lorsqu'un seul objet est demandé (assets)
+            data = parsed.get(meta['entity_id']) or (parsed.get(None, {}) if single_entity else {})
+            points = data.get(meta['datapoint'], {'t': [], 'v': []})
+            count = max(1, len(points['t']))
+            types.extend([meta['group']] * count)
+            names.extend([meta['name']] * count)
+            datapoints.extend([meta['datapoint']] * count)
+            timestamps.extend(points['t'] or [None])
+            values.extend(points['v'] or [np.nan])
+
+    df = pd.DataFrame({
+        'Type': types,
+        'Sensor': names,
+        'Datatype': datapoints,
+        'Timestamp': pd.to_datetime(pd.Series(timestamps, dtype=object), utc=True, format='ISO8601'),
+        'Value': np.asarray(values, dtype=float),
+    }, columns=SNAPSHOT_COLUMNS)
+
+    df = df.sort_values(['Type', 'Sensor', 'Datatype', 'Timestamp'], ascending=[True, True, True, False],
+                        kind='stable', na_position='last').reset_index(drop=True)
+    df['Timestamp'] = df['Timestamp'].dt.strftime(TIMESTAMP_FORMAT)
+    return df
+
+
+def sensor_snapshot(project_id, client, grouped_sensors, selected_data, datapoint_type="derived", limit=1,
+                    max_workers=DEFAULT_MAX_WORKERS, failures=None):
+    """
+    Latest value(s) of every selected (sensor, datapoint) of a project, in one compact table
+    (see latest_values).
+    """
+    sensor_names = {sensor_id: name for group in grouped_sensors for sensor_id, name in group['sensors'].items()}
+    series = [
+        {
+            'group': sensor_type,
+            'entity_id': sensor_id,
+            'name': sensor_names[sensor_id],
+            'datapoint': code,
+            'datapoint_type': current_datapoint_type,
+        }
+        for sensor_type, sensor_id, code, current_datapoint_type in plan_series(grouped_sensors, selected_data,
+                                                                                datapoint_type)
+    ]
+    return latest_values(project_id, client, series, 'Sensor', limit=limit, max_workers=max_workers,
+                         failures=failures)
+
+
+def asset_snapshot(project_id, client, grouped_assets, datapoints, limit=1, max_workers=DEFAULT_MAX_WORKERS,
+                   failures=None):
+    """
+    Latest value(s) of the given derived datapoints of every asset (Type 'Asset', see latest_values).
+    """
+    series = [
+        {'group': 'Asset', 'entity_id': asset_id, 'name': name, 'datapoint': code, 'datapoint_type': 'derived'}
+        for asset_id, name in grouped_assets.items()
+        for code in datapoints
+    ]
+    return latest_values(project_id, client, series, 'Asset', limit=limit, max_workers=max_workers,
+                         failures=failures)
@@ -0,0 +1,191 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+import Z02_messages as messages
+from config_handler import CATALOG_DIR
+
+# Durée (en secondes) pendant laquelle le catalogue local est utilisé sans interroger l'API
+LOCAL_CATALOG_TTL = 12 * 3600
+
+# Nombre d'éléments demandés par page aux points de recherche (sensors/search, assets/search-tree)
+PAGE_SIZE = 500
+
+
+def _page_items(body):
+    """
+    Items of a search response, returned either as a list or as {'data': [...]}.
+    """
+    return body if isinstance(body, list) else body.get('data', [])
+
+
+def search_pages(client, path, json_data, page_size=PAGE_SIZE, etag=None):
+    """
+    Pages through a search endpoint (offset/limit) and returns every item.
+
+    With an etag, the first page is requested conditionally (If-None-Match): a 304 answer
+    means the catalog did not change and nothing else is downloaded. An ETag only covers the
+    page it comes with, so one is returned only when the whole catalog came in a single
+    response; larger catalogs are downloaded again when stale. The loop also stops when a
+    page brings no new id (API ignoring the pagination and returning the full list).
+
+    Args:
+        client (ApiClient): The API client.
+        path (str): Search endpoint ('/api/v2/projects/{id}/sensors/search').
+        json_data (dict): Search body; 'offset' and 'limit' are added to it.
+        page_size (int): Number of items per page.
+        etag (str, optional): ETag of the catalog already stored.
+
+    Returns:
+        tuple: (response, items, etag). items is None when the catalog is unchanged (304)
+        or when a request failed (response.status_code tells which); etag is None when the
+        catalog spans several pages.
+    """
+    items, seen = [], set()
+    offset = 0
+    first_etag = None
+
+    while True:
+        headers = {'If-None-Match': etag} if etag and offset == 0 else {}
+        response = client.post(path, json={**json_data, 'offset': offset, 'limit': page_size}, headers=headers)
+        if response.status_code == 304 and offset == 0:
+            return response, None, etag
+        if response.status_code != 200:
+            return response, None, None
+        if offset == 0:
+            first_etag = response.headers.get('ETag')
+
+        page = _page_items(response.json())
+        new = [item for item in page if item.get('id') not in seen]
+        seen.update(item.get('id') for item in new)
+        items.extend(new)
+
+        # Dernière page, ou pagination ignorée par l'API (éléments déjà reçus)
+        if len(page) < page_size or len(new) < len(page):
+            # ETag valable pour tout le catalogue seulement s'il tient dans la première réponse
+            single_response = offset == 0 or (page and not new)
+            return response, items, first_etag if single_response else None
+        offset += page_size
+
+
+class CatalogCache:
+    """
+    Persistent catalog (sensor list, asset list, derived datapoints of sensors) of one project.
+
+    Each list is stored with its download time and ETag in a JSON file. It is served from
+    disk while younger than ttl; once stale, a single-page list is revalidated with a
+    conditional request (downloaded again only when the API reports a change), and a
+    multi-page list is downloaded again page by page.
+
+    Args:
+        project_id (str): The project ID (one file per project).
+        catalog_dir (str): Folder holding the catalog files.
+        ttl (float): Age in seconds after which a list is revalidated.
+    """
+
+    def __init__(self, project_id, catalog_dir=CATALOG_DIR, ttl=LOCAL_CATALOG_TTL):
+        self.path = os.path.join(catalog_dir, f"{project_id}.json")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self):
+        # Écriture atomique : un fichier lu en même temps par une autre session n'est jamais tronqué
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def age(self, kind):
+        """
+        Age in seconds of a stored list ('sensors', 'assets'), or infinity if absent.
+        """
+        entry = self._data.get(kind)
+        return time.time() - entry['fetched_at'] if entry else math.inf
+
+    def load(self, kind, client, path, json_data, force=False):
+        """
+        Returns a catalog list, from disk when fresh, otherwise revalidated or downloaded.
+
+        Args:
+            kind (str): 'sensors' or 'assets'.
+            client (ApiClient): The API client.
+            path (str): Search endpoint of the list.
+            json_data (dict): Search body.
+            force (bool): Revalidates even a fresh list.
+
+        Returns:
+            tuple: (response, items). response is None when served from disk; items is None
+            when the download failed and nothing is stored.
+        """
+        with self._lock:
+            entry = self._data.get(kind)
+            if entry and not force and self.age(kind) < self.ttl:
+                return None, entry['items']
+
+            response, items, etag = search_pages(client, path, json_data, etag=entry and entry.get('etag'))
+            if items is None:
+                if entry and response.status_code == 304:
+                    # Catalogue inchangé : seule la date de vérification est mise à jour
+                    entry['fetched_at'] = time.time()
+                    self._write()
+                elif entry:
+                    messages.warning(f"Catalogue local utilisé ({kind}) : l'API a répondu {response.status_code}.")
+                return response, entry['items'] if entry else None
+
+            self._data[kind] = {'fetched_at': time.time(), 'etag': etag, 'items': items}
+            if kind == 'sensors':
+                # Nouvelle liste : les données dérivées mémorisées capteur par capteur sont à redécouvrir
+                self._data.pop('sensor_datapoints', None)
+            self._write()
+            return response, items
+
+    def expire(self):
+        """
+        Marks the stored lists as stale: the next load revalidates them with the API.
+        """
+        with self._lock:
+            for entry in self._data.values():
+                if isinstance(entry, dict) and 'fetched_at' in entry:
+                    entry['fetched_at'] = 0
+            if self._data:
+                self._write()
+
+    def sensor_datapoints(self):
+        """
+        Derived datapoints fetched earlier with GET /sensors/{id}, by sensor id.
+        """
+        with self._lock:
+            return dict(self._data.get('sensor_datapoints', {}))
+
+    def store_sensor_datapoints(self, datapoints):
+        """
+        Remembers the derived datapoints of sensors fetched one by one (dict sensor id -> list).
+        """
+        if not datapoints:
+            return
+        with self._lock:
+            self._data.setdefault('sensor_datapoints', {}).update(datapoints)
+            self._write()
+
+
+def expire_catalogs(catalog_dir=CATALOG_DIR):
+    """
+    Marks every stored catalog as stale: the next load revalidates it with the API.
+    """
+    if not os.path.isdir(catalog_dir):
+        return
+    for name in os.listdir(catalog_dir):
+        if name.endswith('.json'):
+            CatalogCache(name[:-len('.json')], catalog_dir).expire()
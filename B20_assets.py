@@ -1,26 +1,40 @@
-import requests
 import pandas as pd
-import streamlit as st
 
-def get_assets(project_id, headers):
+import Z02_messages as messages
+import Z04_instrumentation as instrumentation
+
+from B02_fetch_engine import fetch_all, DEFAULT_MAX_WORKERS
+from B14_timeseries_parser import parse_timeseries_response, empty_series
+from B15_series_table import SeriesTable, default_label
+from B17_catalog import search_pages
+from Z01_time_windows import split_time_window, DEFAULT_TIME_CHUNK
+from Z03_resampling import resample_points, layout_points, DEFAULT_RESOLUTION, DEFAULT_AGGREGATION, DEFAULT_LAYOUT
+
+# Données dérivées des assets extraites par défaut
+DEFAULT_ASSET_DATAPOINTS = ('N_moy',)
+
+@instrumentation.stage('get_assets', rows=len)
+def get_assets(project_id, client, catalog=None, force=False):
     """
-    Retrieves the list of assets for a given project.
+    Retrieves the list of assets for a given project, page by page
+    (catalog and force: see B11_sensors_list.get_sensors).
     """
+    path = f'/api/v2/projects/{project_id}/assets/search-tree'
     json_data = {
         'with': ['derivedDatapoints']
     }
 
-    response = requests.post(
-        f'https://api.beyond-monitoring.com/api/v2/projects/{project_id}/assets/search-tree',
-        headers=headers,
-        json=json_data
-    )
+    if catalog is not None:
+        response, assets = catalog.load('assets', client, path, json_data, force=force)
+    else:
+        response, assets, _ = search_pages(client, path, json_data)
 
-    if response.status_code != 200:
-        st.error(f"Erreur lors de la récupération des assets : {response.status_code}")
-        return []
+    if assets is None:
+        messages.error(f"Erreur lors de la récupération des assets : {response.status_code}")
+        # Liste des assets indispensable : arrêt (projet en échec en mode sans interface)
+        messages.stop(f"Liste des assets indisponible ({response.status_code}).")
 
-    return response.json().get('data', [])
+    return assets
 
 
 def get_dict_of_id_assets(assets):
@@ -30,23 +44,44 @@ def get_dict_of_id_assets(assets):
     return {asset['id']: asset['name'] for asset in assets}
 
 
-def extract_asset(project_id, headers, grouped_assets, start_time, end_time):
+def get_asset_datapoint_codes(assets):
+    """
+    Lists the derived datapoint codes available on the given assets.
+    """
+    codes = {dp['code'] for asset in assets for dp in asset.get('derivedDatapoints', []) or []}
+    return sorted(codes | set(DEFAULT_ASSET_DATAPOINTS))
+
+
+@instrumentation.stage('extract_asset', rows=lambda table: table.n_points)
+def extract_asset(project_id, client, grouped_assets, start_time, end_time, max_workers=DEFAULT_MAX_WORKERS,
+                  datapoints=DEFAULT_ASSET_DATAPOINTS, time_chunk=DEFAULT_TIME_CHUNK, failures=None):
     """
     Extracts asset data for the specified time range.
+
+    All the requested datapoint codes of an asset are fetched in a single call per
+    sub-window (time_chunk); sub-windows are fetched in parallel and stitched back in order.
+    Requests still failing after the client's retries are appended to `failures`
+    (same format as B12_sensor_informations.extract_data, with sensor_type 'Asset').
+    Returns a SeriesTable with one series per (asset, datapoint), group 'Asset'
+    (see B15_series_table).
     """
-    asset_data = {}
+    asset_data = {}  # asset -> {donnée: série compacte}
+    windows = split_time_window(start_time, end_time, time_chunk)
+    units = [(asset_id, window) for asset_id in grouped_assets.keys() for window in windows]
+    request_list = []
 
-    for asset_id in grouped_assets.keys():
+    for asset_id, (window_start, window_end) in units:
         json_data = {
             'filter': {
-                'startTime': start_time,
-                'endTime': end_time,
+                'startTime': window_start,
+                'endTime': window_end,
                 'datapointTypes': [
                     {
                         'entityId': asset_id,
-                        'datapoint': 'N_moy',
+                        'datapoint': code,
                         'datapointType': 'derived'
                     }
+                    for code in datapoints
                 ],
                 'entityKind': 'Asset',
                 'onlyLatest': False,
@@ -55,55 +90,85 @@ def extract_asset(project_id, headers, grouped_assets, start_time, end_time):
                 'limitLatest': None
             }
         }
-
-        response = requests.post(
-            f'https://api.beyond-monitoring.com/api/projects/{project_id}/timeseriesdata/search',
-            headers=headers,
-            json=json_data
-        )
-
-        if response.status_code != 200:
-            st.warning(f"Erreur pour l'asset {asset_id} : {response.status_code}")
+        request_list.append((
+            'POST',
+            f'/api/projects/{project_id}/timeseriesdata/search',
+            json_data
+        ))
+
+    responses = fetch_all(client, request_list, max_workers=max_workers, parse=parse_timeseries_response)
+
+    # Les unités sont ordonnées par asset puis chronologiquement : on concatène dans cet ordre
+    for (asset_id, (window_start, window_end)), response in zip(units, responses):
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else 'réseau'
+            messages.warning(f"Erreur pour l'asset {grouped_assets[asset_id]} (à partir du {window_start}) : {status}")
+            if failures is not None:
+                failures.extend(
+                    {
+                        'sensor_type': 'Asset',
+                        'sensor': grouped_assets[asset_id],
+                        'datapoint': code,
+                        'start': window_start,
+                        'end': window_end,
+                        'status': status,
+                    }
+                    for code in datapoints
+                )
             continue
 
-        asset_data[asset_id] = response.json().get('data', {})
-
-    return asset_data
-
+        # La réponse peut être indexée par identifiant d'entité (comme pour les capteurs) ou non (clé None)
+        data = response.parsed.get(asset_id, response.parsed.get(None, {}))
 
-def create_dataframes_by_type(asset_data, grouped_assets):
-    """
-    Creates a pandas DataFrame from asset data.
-    """
-    rows = []
+        merged = asset_data.setdefault(asset_id, {})
+        for code, series in data.items():
+            target = merged.setdefault(code, empty_series())
+            target['t'].extend(series['t'])
+            target['v'].extend(series['v'])
 
-    for asset_id, asset_name in grouped_assets.items():
-        sensor_data = asset_data.get(asset_id, {})
+    table = SeriesTable()
+    for asset_id, merged in asset_data.items():
+        for code in datapoints:
+            if code in merged:
+                table.add('Asset', asset_id, grouped_assets[asset_id], code, merged[code])
 
-        # Gestion des erreurs dans la structure
-        if 'datapointTypes' not in sensor_data:
-            st.warning(f"Aucune donnée pour {asset_name}")
-            continue
+    return table
 
-        if 'N_moy' not in sensor_data['datapointTypes']:
-            st.warning(f"Donnée 'N_moy' manquante pour {asset_name}")
-            continue
 
-        datapoints = sensor_data['datapointTypes']['N_moy']
-        for point in datapoints:
-            rows.append({
-                'Name': asset_name,
-                'Value': point['v'],
-                'Timestamp': pd.to_datetime(point['t'])
-            })
+@instrumentation.stage('create_asset_frames', rows=instrumentation.frame_rows)
+def create_dataframes_by_type(asset_data, grouped_assets, datapoints=DEFAULT_ASSET_DATAPOINTS,
+                              resolution=DEFAULT_RESOLUTION, aggregation=DEFAULT_AGGREGATION, layout=DEFAULT_LAYOUT):
+    """
+    Creates a pandas DataFrame from asset data (the SeriesTable returned by extract_asset).
 
-    if not rows:
-        st.warning("Aucune donnée asset disponible.")
+    Columns are named after the asset when a single datapoint is requested,
+    and 'asset-datapoint' otherwise. Points are brought to `resolution` with
+    `aggregation` (see Z03_resampling.resample_points). With layout='long' the
+    table has the columns Timestamp, Asset, Datatype, Value instead (no pivot).
+    """
+    present = asset_data.keys()
+    missing = [
+        f"{asset_name} ({code})"
+        for asset_id, asset_name in grouped_assets.items()
+        for code in datapoints
+        if (asset_id, code) not in present
+    ]
+
+    # Un seul avertissement récapitulatif plutôt qu'un par asset
+    if missing:
+        messages.warning(f"Données manquantes pour {len(missing)} asset(s) : {', '.join(missing)}")
+
+    label = (lambda meta: meta['name']) if len(datapoints) == 1 else default_label
+    points = asset_data.to_long('Asset', label=label, key_column='Name')
+
+    if points.empty:
+        messages.warning("Aucune donnée asset disponible.")
         return pd.DataFrame()
 
-    df = pd.DataFrame(rows)
-    df = df[df['Timestamp'].dt.minute == 0]
-    df_pivot = df.pivot(index='Timestamp', columns='Name', values='Value').reset_index()
-    df_pivot['Timestamp'] = df_pivot['Timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+    df = resample_points(points['Timestamp'], points['Name'], points['Value'], 'Name', resolution, aggregation)
+
+    if df.duplicated(subset=['Timestamp', 'Name']).any():
+        df = df.groupby(['Timestamp', 'Name'], as_index=False).agg({'Value': 'mean'})
 
-    return df_pivot
+    labels = {label(meta): {'Asset': meta['name'], 'Datatype': meta['datapoint']} for meta in asset_data.series}
+    return layout_points(df, 'Name', layout, labels)
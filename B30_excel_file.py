@@ -1,7 +1,79 @@
+import math
+import numbers
+import os
+import tempfile
+
 import pandas as pd
 import io
 import streamlit as st
+import xlsxwriter
+
+import Z02_messages as messages
+import Z04_instrumentation as instrumentation
+
+# Limites du format xlsx : longueur des noms de feuilles, caractères interdits et lignes par feuille
+SHEET_NAME_MAX = 31
+SHEET_NAME_FORBIDDEN = '[]:*?/\\'
+EXCEL_MAX_ROWS = 1048576
+
+# Nom de la feuille des données assets
+ASSETS_SHEET = "all_assets"
+
+# Nombre de lignes converties à la fois en colonnes denses avant écriture (tableaux creux)
+STREAM_BLOCK_ROWS = 10000
+
+
+def unique_names(names, max_length=SHEET_NAME_MAX, forbidden=SHEET_NAME_FORBIDDEN):
+    """
+    Makes names valid and unique once truncated (case-insensitive, as Excel compares sheet names).
+
+    Forbidden characters are replaced by '_' and colliding names get a '~2', '~3'... suffix
+    instead of being silently merged.
+
+    Example: unique_names(['Capteurs de température ambiante intérieure', 'Capteurs de température ambiante extérieure'])
+        -> ['Capteurs de température ambiant', 'Capteurs de température ambia~2']
+    """
+    result = []
+    used = set()
+    for name in names:
+        clean = ''.join('_' if c in forbidden else c for c in str(name)).strip() or 'Feuille'
+        candidate = clean[:max_length] if max_length else clean
+        n = 2
+        while candidate.lower() in used:
+            suffix = f"~{n}"
+            candidate = (clean[:max_length - len(suffix)] if max_length else clean) + suffix
+            n += 1
+        used.add(candidate.lower())
+        result.append(candidate)
+    return result
 
+
+def _sheets(df_dict, extra_df=None, max_rows=EXCEL_MAX_ROWS):
+    """
+    Lists the (sheet name, DataFrame) pairs to write, with unique valid names.
+
+    Frames longer than a sheet (max_rows, header included) are split over
+    continuation sheets rather than silently cut.
+    """
+    parts = []
+    frames = list(df_dict.items())
+    if extra_df is not None and not extra_df.empty:
+        frames.append((ASSETS_SHEET, extra_df))
+
+    for name, df in frames:
+        rows = max_rows - 1
+        if len(df) <= rows:
+            parts.append((name, df))
+            continue
+        messages.warning(f"La feuille '{name}' dépasse {rows} lignes : elle est répartie sur plusieurs feuilles.")
+        for i, start in enumerate(range(0, len(df), rows), start=1):
+            parts.append((name if i == 1 else f"{name} ({i})", df.iloc[start:start + rows]))
+
+    names = unique_names([name for name, _ in parts])
+    return [(sheet, df) for sheet, (_, df) in zip(names, parts)]
+
+
+@instrumentation.stage('export')
 def export_dict_of_dfs_to_excel(df_dict, extra_df=None):
     """
     Exports a dictionary of DataFrames to an Excel file in memory.
@@ -16,13 +88,76 @@ def export_dict_of_dfs_to_excel(df_dict, extra_df=None):
     output = io.BytesIO()
 
     with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        for sheet_name, df in df_dict.items():
-            sheet = sheet_name[:31]  # Sheet name max length = 31
+        for sheet, df in _sheets(df_dict, extra_df):
             df.to_excel(writer, sheet_name=sheet, index=False)
 
-        if extra_df is not None and not extra_df.empty:
-            extra_sheet = "all_assets"[:31]
-            extra_df.to_excel(writer, sheet_name=extra_sheet, index=False)
-
     output.seek(0)
     return output.read()
+
+
+def _write_sheet_streaming(workbook, sheet_name, df, header_format):
+    """
+    Writes a DataFrame row by row into a constant_memory worksheet (empty cells for NaN/None).
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+
+    for col, name in enumerate(df.columns):
+        worksheet.write_string(0, col, str(name), header_format)
+
+    sparse_columns = [column for column in df.columns if isinstance(df[column].dtype, pd.SparseDtype)]
+
+    # En mode constant_memory, les lignes doivent être écrites dans l'ordre et sont vidées sur disque
+    for start in range(0, len(df), STREAM_BLOCK_ROWS):
+        block = df.iloc[start:start + STREAM_BLOCK_ROWS]
+        if sparse_columns:
+            # Colonnes creuses rendues denses par blocs : itération rapide sans tout densifier
+            block = block.astype({column: float for column in sparse_columns})
+        _write_rows(worksheet, block, first_row=start + 1)
+
+
+def _write_rows(worksheet, df, first_row):
+    for row, values in enumerate(df.itertuples(index=False, name=None), start=first_row):
+        for col, value in enumerate(values):
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            if isinstance(value, str):
+                worksheet.write_string(row, col, value)
+            elif isinstance(value, bool):
+                worksheet.write_boolean(row, col, value)
+            elif isinstance(value, numbers.Real):
+                worksheet.write_number(row, col, float(value))
+            else:
+                worksheet.write(row, col, str(value))
+
+
+@instrumentation.stage('export')
+def export_dict_of_dfs_to_excel_file(df_dict, extra_df=None, path=None):
+    """
+    Exports a dictionary of DataFrames to an Excel file on disk, streaming rows.
+
+    The workbook is written with xlsxwriter's constant_memory mode, so only the
+    current row is held in memory and the result is spooled to a file instead
+    of an in-memory buffer.
+
+    Args:
+        df_dict (dict): Dictionary of DataFrames to export.
+        extra_df (pd.DataFrame, optional): An additional DataFrame to include.
+        path (str, optional): Output path (a temporary file is created if omitted).
+
+    Returns:
+        str: The path of the written Excel file.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+
+    try:
+        for sheet, df in _sheets(df_dict, extra_df):
+            _write_sheet_streaming(workbook, sheet, df, header_format)
+    finally:
+        workbook.close()
+
+    return path
@@ -0,0 +1,185 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+import pandas as pd
+
+import Z04_instrumentation as instrumentation
+from B30_excel_file import export_dict_of_dfs_to_excel_file, unique_names, ASSETS_SHEET
+
+try:
+    import pyarrow  # noqa: F401  (moteur Parquet de pandas)
+except ImportError:  # dépendance optionnelle : export Parquet indisponible
+    pyarrow = None
+
+# Caractères interdits dans les noms de fichiers (Windows compris) et longueur maximale
+FILE_NAME_FORBIDDEN = '<>:"/\\|?*'
+FILE_NAME_MAX = 100
+
+# Compression des fichiers Parquet et séparateur des fichiers CSV
+PARQUET_COMPRESSION = 'zstd'
+CSV_SEPARATOR = ','
+
+
+def _named_frames(df_dict, extra_df=None):
+    """
+    Lists the (file stem, DataFrame) pairs to write, with unique file-safe names.
+    """
+    frames = list(df_dict.items())
+    if extra_df is not None and not extra_df.empty:
+        frames.append((ASSETS_SHEET, extra_df))
+    names = unique_names([name for name, _ in frames], max_length=FILE_NAME_MAX, forbidden=FILE_NAME_FORBIDDEN)
+    return [(stem, df) for stem, (_, df) in zip(names, frames)]
+
+
+def _for_parquet(df):
+    """
+    Returns the frame ready for Parquet: Timestamp as datetimes (the builders format it as text
+    for Excel), sparse columns made dense (not supported by Parquet) and string column names.
+    """
+    df = df.copy()
+    if 'Timestamp' in df.columns:
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='ISO8601')
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.SparseDtype):
+            df[column] = df[column].sparse.to_dense()
+    df.columns = [str(column) for column in df.columns]
+    return df
+
+
+def _zip_directory(directory, path, compression=zipfile.ZIP_STORED):
+    with zipfile.ZipFile(path, 'w', compression) as archive:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                archive.write(full_path, os.path.relpath(full_path, directory))
+
+
+def export_dict_of_dfs_to_parquet(df_dict, extra_df=None, path=None, partition_by_month=False):
+    """
+    Exports a dictionary of DataFrames to compressed Parquet files, one per sensor type.
+
+    Args:
+        df_dict (dict): Dictionary of DataFrames to export.
+        extra_df (pd.DataFrame, optional): An additional DataFrame to include (assets).
+        path (str, optional): A '.zip' path packs the files into an archive; any other path
+            is used as a directory. A temporary zip file is created if omitted.
+        partition_by_month (bool): Writes each type as a dataset partitioned by month
+            ('<type>/month=2025-01/...parquet') instead of a single file.
+
+    Returns:
+        str: The path of the written archive or directory.
+    """
+    if pyarrow is None:
+        raise ImportError("L'export Parquet nécessite le paquet pyarrow (pip install pyarrow).")
+
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+    as_zip = path.lower().endswith('.zip')
+    directory = tempfile.mkdtemp() if as_zip else path
+    os.makedirs(directory, exist_ok=True)
+
+    try:
+        for stem, df in _named_frames(df_dict, extra_df):
+            df = _for_parquet(df)
+            if partition_by_month and 'Timestamp' in df.columns and not df.empty:
+                df['month'] = df['Timestamp'].dt.strftime('%Y-%m')
+                df.to_parquet(os.path.join(directory, stem), engine='pyarrow', compression=PARQUET_COMPRESSION,
+                              index=False, partition_cols=['month'])
+            else:
+                df.to_parquet(os.path.join(directory, f"{stem}.parquet"), engine='pyarrow',
+                              compression=PARQUET_COMPRESSION, index=False)
+
+        if as_zip:
+            # Fichiers déjà compressés : archive sans recompression
+            _zip_directory(directory, path)
+    finally:
+        if as_zip:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return path
+
+
+def export_dict_of_dfs_to_csv_zip(df_dict, extra_df=None, path=None):
+    """
+    Exports a dictionary of DataFrames to a zip archive holding one CSV file per sensor type.
+
+    Each CSV is written straight into the compressed archive, without an intermediate copy.
+
+    Args:
+        df_dict (dict): Dictionary of DataFrames to export.
+        extra_df (pd.DataFrame, optional): An additional DataFrame to include (assets).
+        path (str, optional): Output path (a temporary file is created if omitted).
+
+    Returns:
+        str: The path of the written zip file.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for stem, df in _named_frames(df_dict, extra_df):
+            with archive.open(f"{stem}.csv", 'w') as raw:
+                with io.TextIOWrapper(raw, encoding='utf-8', newline='') as text:
+                    df.to_csv(text, sep=CSV_SEPARATOR, index=False)
+
+    return path
+
+
+# Formats d'export disponibles : libellé, extension du fichier produit, type MIME et fonction d'écriture
+EXPORT_FORMATS = {
+    'xlsx': {
+        'label': "Excel (.xlsx)",
+        'extension': '.xlsx',
+        'mime': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        'writer': export_dict_of_dfs_to_excel_file,
+    },
+    'parquet': {
+        'label': "Parquet (.zip)",
+        'extension': '.zip',
+        'mime': "application/zip",
+        'writer': export_dict_of_dfs_to_parquet,
+    },
+    'csv': {
+        'label': "CSV (.zip)",
+        'extension': '.zip',
+        'mime': "application/zip",
+        'writer': export_dict_of_dfs_to_csv_zip,
+    },
+}
+DEFAULT_EXPORT_FORMAT = 'xlsx'
+
+
+def available_formats():
+    """
+    Returns the export formats usable with the installed packages.
+    """
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or pyarrow is not None]
+
+
+@instrumentation.stage('export')
+def export_frames(df_dict, extra_df=None, fmt=DEFAULT_EXPORT_FORMAT, path=None, partition_by_month=False):
+    """
+    Exports a dictionary of DataFrames with the chosen format (see EXPORT_FORMATS).
+
+    Args:
+        df_dict (dict): Dictionary of DataFrames to export.
+        extra_df (pd.DataFrame, optional): An additional DataFrame to include (assets).
+        fmt (str): 'xlsx', 'parquet' or 'csv'.
+        path (str, optional): Output path (a temporary file is created if omitted).
+        partition_by_month (bool): Parquet only, see export_dict_of_dfs_to_parquet.
+
+    Returns:
+        str: The path of the written file (or directory for a Parquet export to a non-zip path).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (valeurs possibles : {', '.join(EXPORT_FORMATS)})")
+
+    writer = EXPORT_FORMATS[fmt]['writer']
+    if fmt == 'parquet':
+        return writer(df_dict, extra_df=extra_df, path=path, partition_by_month=partition_by_month)
+    return writer(df_dict, extra_df=extra_df, path=path)
@@ -0,0 +1,129 @@
+import datetime
+
+
+def parse_time(value):
+    """
+    Parses an ISO 8601 timestamp ('2025-01-12T00:00:00.000Z') into an aware UTC datetime.
+    """
+    if isinstance(value, datetime.datetime):
+        dt = value
+    else:
+        dt = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.astimezone(datetime.timezone.utc)
+
+
+def format_time(dt):
+    """
+    Formats a datetime as the API expects it ('2025-01-12T00:00:00.000Z').
+    """
+    dt = parse_time(dt)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}Z"
+
+
+# Écart maximal entre deux intervalles considérés comme contigus (fin à x.999, début suivant à x+1.000)
+CONTIGUITY_TOLERANCE = datetime.timedelta(milliseconds=1)
+
+
+def merge_intervals(intervals):
+    """
+    Merges overlapping or touching (start, end) datetime intervals.
+
+    Returns:
+        list: Sorted, non-overlapping intervals.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + CONTIGUITY_TOLERANCE:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_intervals(start, end, covered):
+    """
+    Returns the parts of [start, end] not covered by the given intervals.
+
+    Args:
+        start (datetime): Start of the requested window.
+        end (datetime): End of the requested window.
+        covered (list): (start, end) intervals already available.
+
+    Returns:
+        list: Sorted (start, end) intervals still to be fetched.
+
+        Example: missing_intervals(jan_1, jan_31, [(jan_1, jan_20)]) -> [(jan_20, jan_31)]
+    """
+    missing = []
+    cursor = start
+    for covered_start, covered_end in merge_intervals(covered):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor + CONTIGUITY_TOLERANCE:
+            missing.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+# Découpage par défaut des longues périodes d'extraction
+DEFAULT_TIME_CHUNK = 'month'
+
+# Découpages calendaires acceptés par split_time_window (ou une durée datetime.timedelta)
+TIME_CHUNKS = ('month', 'week', 'day')
+
+
+def _next_boundary(dt, chunk):
+    if chunk == 'month':
+        if dt.month == 12:
+            return dt.replace(year=dt.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        return dt.replace(month=dt.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    if chunk == 'week':
+        return (dt + datetime.timedelta(days=7 - dt.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    if chunk == 'day':
+        return (dt + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt + chunk
+
+
+def split_time_window(start_time, end_time, chunk=DEFAULT_TIME_CHUNK):
+    """
+    Splits [start_time, end_time] into consecutive, non-overlapping sub-windows.
+
+    Args:
+        start_time (str): Start of the window (ISO 8601).
+        end_time (str): End of the window (ISO 8601).
+        chunk: 'month', 'week', 'day' (calendar aligned), a datetime.timedelta,
+            or None to keep the window whole.
+
+    Returns:
+        list: (start_time, end_time) string pairs in chronological order; each
+        sub-window ends 1 ms before the next one starts.
+
+        Example: split_time_window('2025-01-15T00:00:00.000Z', '2025-02-10T23:59:59.000Z')
+        -> [('2025-01-15T00:00:00.000Z', '2025-01-31T23:59:59.999Z'),
+            ('2025-02-01T00:00:00.000Z', '2025-02-10T23:59:59.000Z')]
+    """
+    if chunk is None:
+        return [(start_time, end_time)]
+    if not isinstance(chunk, datetime.timedelta) and chunk not in TIME_CHUNKS:
+        raise ValueError(f"Découpage inconnu : {chunk} (valeurs possibles : {', '.join(TIME_CHUNKS)}, "
+                         "une durée ou None)")
+    if isinstance(chunk, datetime.timedelta) and chunk <= datetime.timedelta(0):
+        raise ValueError("La durée de découpage doit être positive.")
+
+    start = parse_time(start_time)
+    end = parse_time(end_time)
+    windows = []
+    while True:
+        boundary = _next_boundary(start, chunk)
+        # Fin sur une limite de découpage : dernière fenêtre jusqu'à end inclus, sans fenêtre vide après
+        if boundary >= end:
+            windows.append((format_time(start), format_time(end)))
+            return windows
+        windows.append((format_time(start), format_time(boundary - datetime.timedelta(milliseconds=1))))
+        start = boundary
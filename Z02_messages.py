@@ -0,0 +1,55 @@
+import sys
+
+import streamlit as st
+
+
+class ExtractionStopped(Exception):
+    """
+    Raised by stop() when running without Streamlit (headless batch exports).
+    """
+
+
+def _in_streamlit():
+    """
+    Returns True when the code runs inside a Streamlit app (`streamlit run`).
+    """
+    return st.runtime.exists()
+
+
+def error(message):
+    """
+    Displays an error in the Streamlit page, or prints it to stderr in headless mode.
+    """
+    if _in_streamlit():
+        st.error(message)
+    else:
+        print(f"ERREUR : {message}", file=sys.stderr)
+
+
+def warning(message):
+    """
+    Displays a warning in the Streamlit page, or prints it to stderr in headless mode.
+    """
+    if _in_streamlit():
+        st.warning(message)
+    else:
+        print(f"ATTENTION : {message}", file=sys.stderr)
+
+
+def info(message):
+    """
+    Displays an information message in the Streamlit page, or prints it in headless mode.
+    """
+    if _in_streamlit():
+        st.info(message)
+    else:
+        print(message)
+
+
+def stop(message=None):
+    """
+    Stops the Streamlit script run, or raises ExtractionStopped in headless mode.
+    """
+    if _in_streamlit():
+        st.stop()
+    raise ExtractionStopped(message or "Extraction interrompue.")
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+# Résolution et méthode d'agrégation par défaut des séries exportées
+DEFAULT_RESOLUTION = '1h'
+DEFAULT_AGGREGATION = 'sample'
+
+# 'sample' : point situé au début de chaque période (comportement historique, ex. hh:00)
+AGGREGATIONS = ('sample', 'mean', 'first', 'last', 'min', 'max')
+
+
+def resample_points(timestamps, keys, values, key_column='ID',
+                    resolution=DEFAULT_RESOLUTION, aggregation=DEFAULT_AGGREGATION):
+    """
+    Brings raw points to a regular resolution.
+
+    Args:
+        timestamps (pd.Series): Parsed (UTC) timestamps of the points.
+        keys (array-like): Column identifier of each point (e.g. 'Sensor-DX').
+        values (array-like): Value of each point.
+        key_column (str): Name of the identifier column in the result.
+        resolution (str): Pandas offset alias of the output period (e.g. '1h', '15min', '1D').
+        aggregation (str): 'sample' keeps the point falling in the first minute of each
+            period; 'mean', 'first', 'last', 'min' and 'max' aggregate all the points of
+            the period.
+
+    Returns:
+        pd.DataFrame: Columns Timestamp (start of period), key_column, Value.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Agrégation inconnue : {aggregation} (valeurs possibles : {', '.join(AGGREGATIONS)})")
+
+    timestamps = pd.Series(timestamps).reset_index(drop=True)
+    keys = np.asarray(keys, dtype=object)
+    values = np.asarray(values, dtype=float)
+
+    minutes = timestamps.dt.floor('min')
+    periods = timestamps.dt.floor(resolution)
+
+    if aggregation == 'sample':
+        mask = (minutes == periods).to_numpy()
+        # .array : horodatages conservés en datetime64 (to_numpy() créerait un objet Timestamp par point)
+        return pd.DataFrame({
+            'Timestamp': minutes[mask].array,
+            key_column: keys[mask],
+            'Value': values[mask],
+        })
+
+    df = pd.DataFrame({'Timestamp': periods.array, key_column: keys, 'Value': values})
+    if aggregation in ('first', 'last'):
+        # L'ordre chronologique des points détermine le premier / dernier de chaque période
+        df = df.iloc[np.argsort(timestamps.array.asi8, kind='stable')]
+    return df.groupby(['Timestamp', key_column], as_index=False, sort=False)['Value'].agg(aggregation)
+
+
+# Mise en forme des tableaux exportés :
+# 'wide' : une colonne par série (pivot creux) ; 'long' : une ligne par point, sans pivot
+LAYOUTS = ('wide', 'long')
+DEFAULT_LAYOUT = 'wide'
+
+# Format des horodatages exportés
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M'
+
+
+def sparse_pivot(df, key_column='ID'):
+    """
+    Pivots Timestamp/key/Value rows into one column per key, without a dense intermediate.
+
+    Each column is stored as a sparse array (NaN fill value), so memory scales with the
+    number of points rather than timestamps x columns when series report at different times.
+    Duplicate (Timestamp, key) pairs must have been aggregated beforehand.
+
+    Returns:
+        pd.DataFrame: A Timestamp column (sorted unique timestamps) followed by one column per
+        key (sorted), as df.pivot(...).reset_index() would produce.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=pd.Index(['Timestamp'], name=key_column))
+
+    timestamp_codes, timestamps = pd.factorize(df['Timestamp'], sort=True)
+    key_codes, keys = pd.factorize(df[key_column], sort=True)
+    values = df['Value'].to_numpy(dtype=float)
+
+    # Points regroupés par clé : une seule passe sur les données
+    order = np.argsort(key_codes, kind='stable')
+    bounds = np.searchsorted(key_codes[order], np.arange(len(keys) + 1))
+
+    columns = {'Timestamp': timestamps}
+    for k, key in enumerate(keys):
+        selected = order[bounds[k]:bounds[k + 1]]
+        column = np.full(len(timestamps), np.nan)
+        column[timestamp_codes[selected]] = values[selected]
+        columns[key] = pd.arrays.SparseArray(column, fill_value=np.nan)
+
+    result = pd.DataFrame(columns)
+    result.columns.name = key_column
+    return result
+
+
+def layout_points(df, key_column='ID', layout=DEFAULT_LAYOUT, labels=None):
+    """
+    Shapes resampled rows (Timestamp, key_column, Value) into the exported table.
+
+    Args:
+        df (pd.DataFrame): Rows with unique (Timestamp, key) pairs.
+        key_column (str): Name of the key column.
+        layout (str): 'wide' (sparse pivot, one column per key) or 'long' (one row per point).
+        labels (dict, optional): Long layout only: replaces the key column by the given
+            columns, e.g. {'FISS_2D_R+3_Paris-DX': {'Sensor': 'FISS_2D_R+3_Paris', 'Datatype': 'DX'}}.
+
+    Returns:
+        pd.DataFrame: The table, with timestamps formatted as TIMESTAMP_FORMAT.
+
+        Example (long):          Timestamp             Sensor Datatype     Value
+                         0  2025-01-12 00:00  FISS_2D_R+3_Paris       DX  3.471065
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Mise en forme inconnue : {layout} (valeurs possibles : {', '.join(LAYOUTS)})")
+
+    if df.empty:
+        # Aucun point (ex. aucun point au début d'une période avec 'sample') : tableau vide
+        names = list(next(iter(labels.values()))) if labels else [key_column]
+        return pd.DataFrame(columns=['Timestamp'] if layout == 'wide' else ['Timestamp', *names, 'Value'])
+
+    if layout == 'wide':
+        result = sparse_pivot(df, key_column)
+        result['Timestamp'] = result['Timestamp'].dt.strftime(TIMESTAMP_FORMAT)
+        return result
+
+    # Colonnes répétitives en catégories : chaque horodatage et libellé n'est formaté / stocké qu'une fois
+    result = df.sort_values([key_column, 'Timestamp'], kind='stable')
+    timestamp_codes, timestamps = pd.factorize(result['Timestamp'], sort=True)
+    key_codes, keys = pd.factorize(result[key_column], sort=True)
+
+    formatted, positions = np.unique(np.asarray(timestamps.strftime(TIMESTAMP_FORMAT), dtype=object), return_inverse=True)
+    columns = {'Timestamp': pd.Categorical.from_codes(positions[timestamp_codes], formatted)}
+    if labels:
+        for name in next(iter(labels.values())):
+            values = [labels[key][name] for key in keys]
+            categories, positions = np.unique(values, return_inverse=True)
+            columns[name] = pd.Categorical.from_codes(positions[key_codes], categories)
+    else:
+        columns[key_column] = pd.Categorical.from_codes(key_codes, keys)
+    columns['Value'] = result['Value'].to_numpy()
+    return pd.DataFrame(columns)
@@ -0,0 +1,187 @@
+"""
+Per-stage instrumentation of an extraction run: wall time, HTTP requests, response bytes,
+latency percentiles and rows produced.
+
+A RunMetrics is activated for a run (a Streamlit script run, one project of a batch export);
+the functions decorated with @stage then record their duration, and every HTTP request sent
+by B01_api_client.ApiClient while they run is counted in that stage. Nothing is recorded
+when no RunMetrics is active.
+
+Example:
+    metrics = RunMetrics()
+    with metrics.activate():
+        client = login(email, password)
+        sensors = get_sensors(project_id, client)
+    metrics.report()['stages']['get_sensors']
+    # {'calls': 1, 'seconds': 0.84, 'requests': 1, 'errors': 0, 'bytes': 182311, 'rows': 240,
+    #  'latency_ms': {'p50': 812.0, 'p90': 812.0, 'p99': 812.0, 'max': 812.0}}
+"""
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+import numpy as np
+
+# Étape à laquelle sont rattachées les requêtes envoyées hors de toute fonction instrumentée
+OTHER_STAGE = 'other'
+
+# Percentiles de latence publiés dans le rapport
+LATENCY_PERCENTILES = (50, 90, 99)
+
+# (RunMetrics actif, étape en cours) du contexte courant ; copié dans les threads de B02_fetch_engine
+_current = contextvars.ContextVar('run_metrics', default=(None, None))
+
+
+def _new_stage():
+    return {'calls': 0, 'seconds': 0.0, 'requests': 0, 'errors': 0, 'bytes': 0, 'rows': None, 'latencies': []}
+
+
+class RunMetrics:
+    """
+    Thread-safe collector of the per-stage measures of one run.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Makes this collector the one used by @stage and the API client in the current context.
+        """
+        token = _current.set((self, None))
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def install(self):
+        """
+        Activates this collector for the rest of the current context, without a with block
+        (a Streamlit script run, which installs a new collector at each rerun).
+        """
+        _current.set((self, None))
+        return self
+
+    def _stage(self, name):
+        return self._stages.setdefault(name or OTHER_STAGE, _new_stage())
+
+    def add_call(self, name, seconds, rows=None):
+        with self._lock:
+            record = self._stage(name)
+            record['calls'] += 1
+            record['seconds'] += seconds
+            if rows is not None:
+                record['rows'] = (record['rows'] or 0) + rows
+
+    def add_request(self, name, latency, status=None, nbytes=0):
+        """
+        Records one HTTP attempt (status None: network error without response).
+        """
+        with self._lock:
+            record = self._stage(name)
+            record['requests'] += 1
+            record['latencies'].append(latency)
+            record['bytes'] += nbytes
+            if status is None or status >= 400:
+                record['errors'] += 1
+
+    def add_bytes(self, name, nbytes):
+        with self._lock:
+            self._stage(name)['bytes'] += nbytes
+
+    def report(self):
+        """
+        Returns the measures as a JSON-serializable dict.
+
+        Example: {'started': '2025-01-12T08:00:00', 'seconds': 42.1,
+                  'totals': {'requests': 31, 'errors': 1, 'bytes': 51234567},
+                  'stages': {'extract_data': {...}, 'create_dataframes_by_type': {...}}}
+        """
+        with self._lock:
+            stages = {}
+            for name, record in self._stages.items():
+                latencies = np.asarray(record['latencies'], dtype=float) * 1000
+                stages[name] = {key: value for key, value in record.items() if key != 'latencies'}
+                stages[name]['seconds'] = round(record['seconds'], 3)
+                stages[name]['latency_ms'] = {
+                    **{f"p{p}": round(float(np.percentile(latencies, p)), 1) for p in LATENCY_PERCENTILES},
+                    'max': round(float(latencies.max()), 1),
+                } if len(latencies) else None
+
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'seconds': round(time.perf_counter() - self._start, 3),
+            'totals': {key: sum(stage[key] for stage in stages.values()) for key in ('requests', 'errors', 'bytes')},
+            'stages': stages,
+        }
+
+
+def current():
+    """
+    Returns (active RunMetrics or None, current stage name or None).
+    """
+    return _current.get()
+
+
+def stage(name, rows=None):
+    """
+    Decorator recording the wall time of each call as stage `name` of the active RunMetrics.
+
+    Args:
+        name (str): Stage name in the report.
+        rows (callable, optional): Returns the number of rows produced from the result.
+
+    Nested instrumented calls are counted in the outermost stage.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            metrics, active_stage = _current.get()
+            if metrics is None or active_stage is not None:
+                return function(*args, **kwargs)
+
+            token = _current.set((metrics, name))
+            start = time.perf_counter()
+            result = None
+            try:
+                result = function(*args, **kwargs)
+                return result
+            finally:
+                _current.reset(token)
+                metrics.add_call(name, time.perf_counter() - start,
+                                 rows(result) if rows and result is not None else None)
+        return wrapper
+    return decorator
+
+
+def record_request(latency, status=None, nbytes=0):
+    """
+    Counts one HTTP attempt in the current stage (no-op without an active RunMetrics).
+    """
+    metrics, name = _current.get()
+    if metrics is not None:
+        metrics.add_request(name, latency, status, nbytes)
+
+
+def record_bytes(nbytes):
+    """
+    Adds the size of a streamed response body, read after the request was recorded.
+    """
+    metrics, name = _current.get()
+    if metrics is not None:
+        metrics.add_bytes(name, nbytes)
+
+
+def frame_rows(df_dict):
+    """
+    Number of rows of a dict of DataFrames (or of a single DataFrame).
+    """
+    if hasattr(df_dict, 'shape'):
+        return len(df_dict)
+    return sum(len(df) for df in df_dict.values())
@@ -0,0 +1,84 @@
+"""
+Measures rows/second of B12.create_dataframes_by_type against the former per-point builder.
+
+Usage: python benchmarks/bench_dataframes.py [--sensors 100] [--points 5000] [--skip-legacy]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from B12_sensor_informations import create_dataframes_by_type
+from benchmarks.synthetic import make_sensor_payload
+
+
+def legacy_create_dataframes_by_type(sensor_data, grouped_sensors):
+    """
+    Former implementation: one dict and one pd.to_datetime call per point.
+    """
+    df_dict = {}
+    for group in grouped_sensors:
+        sensor_type = group['type']
+        rows = []
+        for sensor_id in group['sensors'].keys():
+            for sensor_dict in sensor_data[sensor_type].get(sensor_id, []):
+                if sensor_id not in sensor_dict:
+                    continue
+                for datatype, datapoints in sensor_dict[sensor_id].get('datapointTypes', {}).items():
+                    for point in datapoints:
+                        rows.append({
+                            'Identifier': sensor_id,
+                            'Datatype': datatype,
+                            'Value': point['v'],
+                            'Timestamp': pd.to_datetime(point['t'])
+                        })
+        df = pd.DataFrame(rows)
+        df['Identifier'] = df['Identifier'].map(group['sensors'])
+        df = df[df['Timestamp'].dt.minute == 0]
+        df['Timestamp'] = df['Timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+        df = df.reset_index(drop=True)
+        df['ID'] = df['Identifier'] + '-' + df['Datatype']
+        df = df[['Timestamp', 'ID', 'Value']]
+        if df.duplicated(subset=['Timestamp', 'ID']).any():
+            df = df.groupby(['Timestamp', 'ID'], as_index=False).agg({'Value': 'mean'})
+        df_dict[sensor_type] = df.pivot(index='Timestamp', columns='ID', values='Value').reset_index()
+    return df_dict
+
+
+def _time(builder, sensor_data, grouped_sensors, n_rows, label):
+    start = time.perf_counter()
+    result = builder(sensor_data, grouped_sensors)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10}: {elapsed:7.2f} s  {n_rows / elapsed:12,.0f} points/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sensors', type=int, default=100)
+    parser.add_argument('--points', type=int, default=5000)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    sensor_data, grouped_sensors = make_sensor_payload(args.sensors, args.points)
+    n_rows = args.sensors * args.points * 2
+    print(f"{n_rows:,} points ({args.sensors} capteurs x {args.points} points x 2 données)")
+
+    new = _time(create_dataframes_by_type, sensor_data, grouped_sensors, n_rows, "vectorisé")
+    if not args.skip_legacy:
+        raw_data, _ = make_sensor_payload(args.sensors, args.points, raw=True)
+        old = _time(legacy_create_dataframes_by_type, raw_data, grouped_sensors, n_rows, "historique")
+        for sensor_type in old:
+            pd.testing.assert_frame_equal(
+                old[sensor_type].reset_index(drop=True), new[sensor_type].reset_index(drop=True),
+                check_dtype=False
+            )
+        print("Résultats identiques.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Peak Python memory and duration of the in-memory and streaming Excel exports.
+
+Each mode runs in a fresh subprocess measured with tracemalloc.
+
+Usage: python benchmarks/bench_excel_export.py [--sheets 50] [--rows 2000] [--cols 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_frames(sheets, rows, cols):
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range('2024-01-01', periods=rows, freq='h').strftime('%Y-%m-%d %H:%M')
+    frames = {}
+    for i in range(sheets):
+        values = rng.normal(size=(rows, cols))
+        values[rng.random(size=values.shape) < 0.1] = np.nan
+        df = pd.DataFrame(values, columns=[f"CAPTEUR_{j:03d}-DX" for j in range(cols)])
+        df.insert(0, 'Timestamp', timestamps)
+        frames[f"Type de capteur {i:02d}"] = df
+    return frames
+
+
+def run_mode(mode, sheets, rows, cols):
+    from B30_excel_file import export_dict_of_dfs_to_excel, export_dict_of_dfs_to_excel_file
+
+    frames = make_frames(sheets, rows, cols)
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == 'memory':
+        size = len(export_dict_of_dfs_to_excel(frames))
+    else:
+        path = export_dict_of_dfs_to_excel_file(frames)
+        size = os.path.getsize(path)
+        os.remove(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{mode:<10}: {elapsed:6.2f} s  pic mémoire {peak / 2**20:8.1f} Mo  fichier {size / 2**20:6.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sheets', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--mode', choices=['memory', 'streaming'])
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.sheets, args.rows, args.cols)
+        return
+
+    print(f"{args.sheets} feuilles x {args.rows} lignes x {args.cols + 1} colonnes "
+          f"= {args.sheets * args.rows * (args.cols + 1):,} cellules")
+    for mode in ('memory', 'streaming'):
+        subprocess.run([
+            sys.executable, os.path.abspath(__file__), '--mode', mode,
+            '--sheets', str(args.sheets), '--rows', str(args.rows), '--cols', str(args.cols)
+        ], check=True)
+
+
+if __name__ == '__main__':
+    main()
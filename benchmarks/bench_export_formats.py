@@ -0,0 +1,63 @@
+"""
+Write time and output size of each export format on the same frames.
+
+Usage: python benchmarks/bench_export_formats.py [--sheets 20] [--rows 8760] [--cols 20]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_excel_export import make_frames
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+    return os.path.getsize(path)
+
+
+def main():
+    from B30_excel_file import export_dict_of_dfs_to_excel
+    from B31_exporters import available_formats, export_frames
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sheets', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=8760)
+    parser.add_argument('--cols', type=int, default=20)
+    args = parser.parse_args()
+
+    frames = make_frames(args.sheets, args.rows, args.cols)
+    print(f"{args.sheets} types x {args.rows} lignes x {args.cols + 1} colonnes "
+          f"= {args.sheets * args.rows * (args.cols + 1):,} cellules")
+
+    start = time.perf_counter()
+    size = len(export_dict_of_dfs_to_excel(frames))
+    print(f"{'xlsx (mémoire)':<22}: {time.perf_counter() - start:7.2f} s  {size / 2**20:7.1f} Mo")
+
+    directory = tempfile.mkdtemp()
+    cases = [(fmt, False) for fmt in available_formats()]
+    if 'parquet' in available_formats():
+        cases.append(('parquet', True))
+    try:
+        for fmt, by_month in cases:
+            label = f"{fmt} (par mois)" if by_month else fmt
+            path = os.path.join(directory, label.replace(' ', '_'))
+            start = time.perf_counter()
+            path = export_frames(frames, fmt=fmt, partition_by_month=by_month,
+                                 path=path if fmt == 'parquet' else None)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<22}: {elapsed:7.2f} s  {_size(path) / 2**20:7.1f} Mo")
+            if not os.path.isdir(path):
+                os.remove(path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
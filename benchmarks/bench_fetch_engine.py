@@ -0,0 +1,52 @@
+"""
+Compares a sequential requests.post loop with B02_fetch_engine.fetch_all against the local stub server.
+
+Usage: python benchmarks/bench_fetch_engine.py [--requests 200] [--latency 0.05] [--workers 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from B01_api_client import ApiClient
+from B02_fetch_engine import fetch_all
+from benchmarks.stub_server import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16])
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    url = f"{base_url}/api/projects/bench/timeseriesdata/search"
+    body = {'filter': {'datapointTypes': []}}
+
+    try:
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            requests.post(url, json=body)
+        sequential = time.perf_counter() - start
+        print(f"séquentiel          : {sequential:7.2f} s ({args.requests} requêtes)")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            client = ApiClient(base_url=base_url, pool_size=workers)
+            responses = fetch_all(client, [('POST', url, body)] * args.requests, max_workers=workers)
+            client.close()
+            elapsed = time.perf_counter() - start
+            ok = sum(1 for r in responses if r is not None and r.status_code == 200)
+            print(f"fetch_all x{workers:<3}      : {elapsed:7.2f} s ({ok}/{args.requests} OK, "
+                  f"gain x{sequential / elapsed:.1f})")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
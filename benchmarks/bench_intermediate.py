@@ -0,0 +1,95 @@
+"""
+Memory held by the extraction result for a large project, per intermediate format.
+
+Modes:
+    points   former nested dict of raw point dicts (response.json())
+    compact  nested dict of compact {'t', 'v'} series (B14_timeseries_parser)
+    table    SeriesTable of numpy arrays (B15_series_table), as returned by extract_data
+
+Each mode decodes one response body per sensor, keeps the result, and runs in a
+fresh subprocess measured with tracemalloc.
+
+Usage: python benchmarks/bench_intermediate.py [--sensors 200] [--points 4380]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_search_body
+
+MODES = ('points', 'compact', 'table')
+DATAPOINTS = ('DX', 'DY')
+
+
+def run_mode(mode, n_sensors, n_points):
+    from B14_timeseries_parser import _from_document
+    from B15_series_table import SeriesTable
+
+    # Même corps décodé pour chaque capteur : chaque décodage crée de nouveaux objets
+    body = make_search_body(1, n_points, DATAPOINTS, step_minutes=60)
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == 'points':
+        result = {'crack_meters': {}}
+        for i in range(n_sensors):
+            sensor_id = f"sensor{i:05d}"
+            data = json.loads(body)['data']['sensor00000']['datapointTypes']
+            result['crack_meters'][sensor_id] = [
+                {sensor_id: {'datapointTypes': {code: data[code]}}} for code in DATAPOINTS
+            ]
+    elif mode == 'compact':
+        result = {'crack_meters': {}}
+        for i in range(n_sensors):
+            sensor_id = f"sensor{i:05d}"
+            data = _from_document(json.loads(body))['sensor00000']
+            result['crack_meters'][sensor_id] = [
+                {sensor_id: {'datapointTypes': {code: data[code]}}} for code in DATAPOINTS
+            ]
+    else:
+        result = SeriesTable()
+        for i in range(n_sensors):
+            data = _from_document(json.loads(body))['sensor00000']
+            for code in DATAPOINTS:
+                result.add('crack_meters', f"sensor{i:05d}", f"CAPTEUR_{i:05d}", code, data[code])
+            del data
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = n_sensors * n_points * len(DATAPOINTS)
+    print(f"{mode:<8}: {elapsed:6.2f} s  conservé {current / 2**20:8.1f} Mo ({current / n:6.1f} o/point)"
+          f"  pic {peak / 2**20:8.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sensors', type=int, default=200)
+    parser.add_argument('--points', type=int, default=4380)
+    parser.add_argument('--mode', choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.sensors, args.points)
+        return
+
+    print(f"{args.sensors * args.points * len(DATAPOINTS):,} points "
+          f"({args.sensors} capteurs x {args.points} points x {len(DATAPOINTS)} données)")
+    for mode in MODES:
+        subprocess.run([
+            sys.executable, os.path.abspath(__file__), '--mode', mode,
+            '--sensors', str(args.sensors), '--points', str(args.points)
+        ], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Memory, build time and CSV size of the wide (dense / sparse pivot) and long layouts.
+
+Sensors report hourly but at staggered minutes, so at a 10 minute resolution each
+timestamp only holds the points of 1 sensor out of --stagger.
+
+Usage: python benchmarks/bench_layouts.py [--sensors 300] [--points 4380] [--stagger 6]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from B14_timeseries_parser import series_from_points
+from B15_series_table import SeriesTable
+from B31_exporters import export_dict_of_dfs_to_csv_zip
+from benchmarks.synthetic import make_timestamps, make_points
+from Z03_resampling import resample_points, layout_points, TIMESTAMP_FORMAT
+
+
+def make_table(n_sensors, n_points, stagger):
+    rng = random.Random(0)
+    table = SeriesTable()
+    for i in range(n_sensors):
+        start = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=10 * (i % stagger))
+        timestamps = make_timestamps(n_points, step_minutes=60, start=start)
+        table.add('crack_meters', f"sensor{i:05d}", f"CAPTEUR_{i:05d}", 'DX',
+                  series_from_points(make_points(timestamps, rng)))
+    return table
+
+
+def dense_pivot(df):
+    """
+    Former wide layout: dense pivot.
+    """
+    result = df.pivot(index='Timestamp', columns='ID', values='Value').reset_index()
+    result['Timestamp'] = result['Timestamp'].dt.strftime(TIMESTAMP_FORMAT)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sensors', type=int, default=300)
+    parser.add_argument('--points', type=int, default=4380)
+    parser.add_argument('--stagger', type=int, default=6)
+    args = parser.parse_args()
+
+    table = make_table(args.sensors, args.points, args.stagger)
+    points = table.to_long('crack_meters')
+    df = resample_points(points['Timestamp'], points['ID'], points['Value'], 'ID', '10min', 'sample')
+    labels = {f"CAPTEUR_{i:05d}-DX": {'Sensor': f"CAPTEUR_{i:05d}", 'Datatype': 'DX'} for i in range(args.sensors)}
+    print(f"{len(df):,} points ({args.sensors} capteurs, 1 sur {args.stagger} par horodatage)")
+
+    builders = [
+        ("large dense", dense_pivot),
+        ("large creux", lambda d: layout_points(d, 'ID', 'wide')),
+        ("long", lambda d: layout_points(d, 'ID', 'long', labels)),
+    ]
+    for label, builder in builders:
+        start = time.perf_counter()
+        frame = builder(df)
+        elapsed = time.perf_counter() - start
+        memory = frame.memory_usage(deep=True).sum()
+
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        export_dict_of_dfs_to_csv_zip({'crack_meters': frame}, path=path)
+        size = os.path.getsize(path)
+        os.remove(path)
+        print(f"{label:<12}: {elapsed:6.2f} s  {frame.shape[0]:>9,} x {frame.shape[1]:<5}"
+              f"  mémoire {memory / 2**20:8.1f} Mo  csv.zip {size / 2**20:6.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Peak Python memory and duration of the timeseriesdata/search response decoders.
+
+Modes:
+    json     former behaviour: response.json() kept as nested point dicts
+    orjson   B14_timeseries_parser on a body decoded with orjson
+    stream   B14_timeseries_parser fed incrementally with ijson (body never held in memory)
+
+Each mode runs in a fresh subprocess measured with tracemalloc.
+
+Usage: python benchmarks/bench_parser.py [--sensors 50] [--points 20000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_search_body
+
+MODES = ('json', 'orjson', 'stream')
+
+
+def _response(path, stream):
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    if stream:
+        response.raw = open(path, 'rb')
+    else:
+        with open(path, 'rb') as f:
+            response._content = f.read()
+    return response
+
+
+def run_mode(mode, path):
+    import B14_timeseries_parser as parser
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == 'json':
+        result = _response(path, stream=False).json()
+    elif mode == 'orjson':
+        if parser.orjson is None:
+            print(f"{mode:<8}: orjson non installé")
+            return
+        result = parser._from_document(parser.orjson.loads(_response(path, stream=False).content))
+    else:
+        if parser.ijson is None:
+            print(f"{mode:<8}: ijson non installé")
+            return
+        response = _response(path, stream=True)
+        result = parser.parse_timeseries_response(response)
+        response.raw.close()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{mode:<8}: {elapsed:6.2f} s  pic mémoire {peak / 2**20:8.1f} Mo  résultat conservé {current / 2**20:8.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sensors', type=int, default=50)
+    parser.add_argument('--points', type=int, default=20000)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--body')
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.body)
+        return
+
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        f.write(make_search_body(args.sensors, args.points))
+        path = f.name
+    try:
+        print(f"{args.sensors * args.points * 2:,} points, corps de {os.path.getsize(path) / 2**20:.1f} Mo")
+        for mode in MODES:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--mode', mode, '--body', path], check=True)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
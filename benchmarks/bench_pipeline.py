@@ -0,0 +1,112 @@
+"""
+End-to-end benchmark of the extraction pipeline against the local mock API (benchmarks/mock_api.py).
+
+Each stage is timed separately for small / medium / huge project profiles:
+login, get_sensors, derivedDatapoints_list, extract_data, create_dataframes_by_type,
+export_dict_of_dfs_to_excel (in memory) and export_dict_of_dfs_to_excel_file (streaming).
+
+The mock server runs in a separate process so that generating its responses does not
+compete with the measured pipeline for the GIL.
+
+Usage: python benchmarks/bench_pipeline.py [--profiles small medium] [--latency 0.05] [--error-rate 0.01]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, replace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_api import MockConfig
+
+# Profils de projet : taille du catalogue, pas des mesures et période extraite
+PROFILES = {
+    'small': {'config': MockConfig(sensor_types=3, sensors_per_type=10, datapoints=2, assets=5, step_minutes=60),
+              'days': 7},
+    'medium': {'config': MockConfig(sensor_types=6, sensors_per_type=40, datapoints=3, assets=30, step_minutes=10),
+               'days': 30},
+    'huge': {'config': MockConfig(sensor_types=12, sensors_per_type=100, datapoints=2, assets=200, step_minutes=10),
+             'days': 30},
+}
+
+
+def start_mock_process(config):
+    """
+    Starts benchmarks/mock_api.py in a subprocess and returns (process, base_url).
+    """
+    command = [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_api.py')]
+    for field, value in asdict(config).items():
+        command += [f"--{field.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def run_profile(name, profile, args):
+    from B00_login import login
+    from B11_sensors_list import get_sensors, get_list_of_sensor_types, get_dict_of_id_sensors
+    from B12_sensor_informations import derivedDatapoints_list, extract_data, create_dataframes_by_type
+    from B30_excel_file import export_dict_of_dfs_to_excel, export_dict_of_dfs_to_excel_file
+    from Z04_instrumentation import RunMetrics
+
+    config = replace(profile['config'], latency=args.latency, jitter=args.latency / 2, error_rate=args.error_rate)
+    process, base_url = start_mock_process(config)
+
+    timings = []
+
+    def timed(stage, function, *f_args, **f_kwargs):
+        start = time.perf_counter()
+        result = function(*f_args, **f_kwargs)
+        timings.append((stage, time.perf_counter() - start))
+        return result
+
+    try:
+        client = timed('login', login, 'bench@example.com', 'bench', base_url=base_url,
+                       token_url=f"{base_url}/token", max_concurrency=args.workers)
+        sensors = timed('get_sensors', get_sensors, 'bench', client)
+        grouped_sensors = get_dict_of_id_sensors(sensors, get_list_of_sensor_types(sensors))
+        all_datapoints = timed('derivedDatapoints_list', derivedDatapoints_list, 'bench', client, grouped_sensors,
+                               max_workers=args.workers, sensors=sensors)
+        selected_data = [
+            {'sensor_type': group['sensor_type'], 'selectedDerivedDatapoints': group['derivedDatapoints']}
+            for group in all_datapoints
+        ]
+        end = time.strftime('%Y-%m-%d', time.gmtime(time.time() - 86400))
+        start = time.strftime('%Y-%m-%d', time.gmtime(time.time() - 86400 * profile['days']))
+        # Requêtes envoyées par l'extraction (nouvelles tentatives comprises), voir Z04_instrumentation
+        metrics = RunMetrics()
+        with metrics.activate():
+            table = timed('extract_data', extract_data, 'bench', client, grouped_sensors, f"{start}T00:00:00.000Z",
+                          f"{end}T23:59:59.999Z", selected_data, max_workers=args.workers)
+        requests_sent = metrics.report()['stages']['extract_data']['requests']
+        frames = timed('create_dataframes_by_type', create_dataframes_by_type, table, grouped_sensors)
+        timed('export_dict_of_dfs_to_excel', export_dict_of_dfs_to_excel, frames)
+        path = timed('export_dict_of_dfs_to_excel_file', export_dict_of_dfs_to_excel_file, frames)
+        os.remove(path)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"\n=== {name} : {len(sensors)} capteurs, {len(table)} séries, {table.n_points:,} points, "
+          f"{requests_sent} requêtes timeseries ===")
+    for stage, seconds in timings:
+        print(f"  {stage:<34} {seconds:8.2f} s")
+    print(f"  {'total':<34} {sum(seconds for _, seconds in timings):8.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=['small', 'medium'])
+    parser.add_argument('--latency', type=float, default=0.05, help="Latence simulée par requête (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Part de réponses 503/429 simulées")
+    parser.add_argument('--workers', type=int, default=8, help="Requêtes simultanées")
+    args = parser.parse_args()
+
+    for name in args.profiles:
+        run_profile(name, PROFILES[name], args)
+
+
+if __name__ == '__main__':
+    main()
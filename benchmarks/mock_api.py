@@ -0,0 +1,239 @@
+"""
+Local stand-in for the Beyond Monitoring API, serving synthetic data of configurable size.
+
+Implemented endpoints (same paths and shapes as the production API):
+    POST /token                                          OpenID token (password and refresh_token grants)
+    POST /api/v2/projects/{id}/sensors/search            sensor list with sensorType and derivedDatapoints (offset/limit, ETag)
+    GET  /api/v2/projects/{id}/sensors/{sensor_id}       sensor detail
+    POST /api/v2/projects/{id}/assets/search-tree        asset list (offset/limit, ETag)
+    POST /api/projects/{id}/timeseriesdata/search        points on a regular grid (onlyLatest/limitLatest supported)
+
+Latency (with jitter) and transient errors (503 or 429 with Retry-After) can be injected.
+
+Usage:
+    python benchmarks/mock_api.py --sensor-types 5 --sensors-per-type 20 --latency 0.05 --error-rate 0.02
+    then: login(email, password, base_url=URL, token_url=URL + '/token')
+
+Or from Python: server, base_url = start_mock_api(MockConfig(...)).
+"""
+import argparse
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@dataclass
+class MockConfig:
+    """
+    Size of the synthetic project and injected faults.
+    """
+    sensor_types: int = 3
+    sensors_per_type: int = 10
+    datapoints: int = 2
+    assets: int = 5
+    step_minutes: int = 10
+    detail_ratio: float = 0.1   # part des capteurs sans derivedDatapoints intégrés (GET sensors/{id})
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def _sensor_catalog(config):
+    sensors = []
+    for t in range(config.sensor_types):
+        type_name = f"Type de capteur {t + 1:02d}"
+        for i in range(config.sensors_per_type):
+            sensor = {
+                'id': f"{t:04x}{i:020x}",
+                'name': f"CAPTEUR_{t + 1:02d}_{i + 1:04d}",
+                'sensorType': {'languages': {'fr': {'name': type_name}}},
+                'derivedDatapoints': [{'name': f"D{d + 1}", 'code': f"D{d + 1}"} for d in range(config.datapoints)],
+            }
+            sensors.append(sensor)
+    return sensors
+
+
+def _asset_catalog(config):
+    return [
+        {
+            'id': f"a{i:023x}",
+            'name': f"ASSET_{i + 1:04d}",
+            'derivedDatapoints': [{'name': 'N_moy', 'code': 'N_moy'}, {'name': 'N_max', 'code': 'N_max'}],
+        }
+        for i in range(config.assets)
+    ]
+
+
+def _to_ms(value):
+    dt = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return int((dt - EPOCH).total_seconds() * 1000)
+
+
+def _series_json(entity_id, datapoint, start_ms, end_ms, step_ms, limit_latest=None):
+    """
+    Points of one series on the step grid within [start_ms, end_ms], as a JSON array.
+    """
+    first = -(-start_ms // step_ms) * step_ms
+    times = np.arange(first, end_ms + 1, step_ms, dtype=np.int64)
+    if limit_latest:
+        times = times[-int(limit_latest):][::-1]
+    if not len(times):
+        return '[]'
+
+    phase = zlib.crc32(f"{entity_id}/{datapoint}".encode()) % 1000
+    values = np.round(10 * np.sin((times // step_ms + phase) / 50.0) + phase / 100.0, 6)
+    stamps = np.datetime_as_string(times.astype('datetime64[ms]'), unit='ms')
+    return '[' + ','.join(
+        f'{{"v":{v!r},"rv":{v + 1.0!r},"dv":{v!r},"t":"{t}Z","p":null,"e":0}}'
+        for v, t in zip(values.tolist(), stamps.tolist())
+    ) + ']'
+
+
+def start_mock_api(config=None, port=0):
+    """
+    Starts the mock API in a background thread.
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() to stop it; server.request_count
+        holds the number of requests served.
+    """
+    config = config or MockConfig()
+    sensors = _sensor_catalog(config)
+    sensors_by_id = {sensor['id']: sensor for sensor in sensors}
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+
+    # Une partie des capteurs est renvoyée sans derivedDatapoints (détail à demander capteur par capteur)
+    listed = []
+    for index, sensor in enumerate(sensors):
+        if config.detail_ratio and index % max(1, round(1 / config.detail_ratio)) == 0:
+            sensor = {key: value for key, value in sensor.items() if key != 'derivedDatapoints'}
+        listed.append(sensor)
+    assets = _asset_catalog(config)
+    step_ms = config.step_minutes * 60 * 1000
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _prelude(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = self.rfile.read(length) if length else b''
+            with rng_lock:
+                server.request_count += 1
+                delay = config.latency + rng.uniform(0, config.jitter)
+                fail = rng.random() < config.error_rate
+                throttle = rng.random() < 0.5
+            if delay:
+                time.sleep(delay)
+            if fail:
+                if throttle:
+                    self._send(429, b'{"error": "rate limited"}', {'Retry-After': '0'})
+                else:
+                    self._send(503, b'{"error": "unavailable"}')
+                return None
+            return payload
+
+        def do_GET(self):
+            if self._prelude() is None:
+                return
+            match = re.fullmatch(r'/api/v2/projects/[^/]+/sensors/([^/?]+)', self.path)
+            if match and match.group(1) in sensors_by_id:
+                self._send(200, json.dumps(sensors_by_id[match.group(1)]).encode())
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def do_POST(self):
+            payload = self._prelude()
+            if payload is None:
+                return
+            if self.path.startswith('/token'):
+                token = {'access_token': 'mock-access', 'refresh_token': 'mock-refresh',
+                         'expires_in': 3600, 'refresh_expires_in': 0}
+                self._send(200, json.dumps(token).encode())
+            elif re.fullmatch(r'/api/v2/projects/[^/]+/sensors/search', self.path):
+                self._search(json.loads(payload or b'{}'), listed, lambda page: page)
+            elif re.fullmatch(r'/api/v2/projects/[^/]+/assets/search-tree', self.path):
+                self._search(json.loads(payload or b'{}'), assets, lambda page: {'data': page})
+            elif re.fullmatch(r'/api/projects/[^/]+/timeseriesdata/search', self.path):
+                self._send(200, self._timeseries(json.loads(payload)['filter']))
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def _search(self, body, items, wrap):
+            offset = int(body.get('offset') or 0)
+            limit = body.get('limit')
+            page = items[offset:offset + int(limit)] if limit else items
+            content = json.dumps(wrap(page)).encode()
+            # ETag propre à la page renvoyée
+            etag = f'"{zlib.crc32(content):08x}"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, b'', {'ETag': etag})
+            else:
+                self._send(200, content, {'ETag': etag})
+
+        def _timeseries(self, flt):
+            start_ms, end_ms = _to_ms(flt['startTime']), _to_ms(flt['endTime'])
+            limit = (flt.get('limitLatest') or 1) if flt.get('onlyLatest') else None
+            entities = {}
+            for entry in flt['datapointTypes']:
+                entities.setdefault(entry['entityId'], []).append(entry['datapoint'])
+            parts = []
+            for entity_id, codes in entities.items():
+                series = ','.join(
+                    f'"{code}":{_series_json(entity_id, code, start_ms, end_ms, step_ms, limit)}' for code in codes
+                )
+                parts.append(f'"{entity_id}":{{"datapointTypes":{{{series}}}}}')
+            return ('{"data":{' + ','.join(parts) + '}}').encode()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = MockConfig()
+    parser.add_argument('--port', type=int, default=0)
+    for field, value in vars(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    config = MockConfig(**{field: getattr(args, field) for field in vars(defaults)})
+    server, base_url = start_mock_api(config, args.port)
+    # Première ligne lue par les benchmarks pour connaître l'adresse du serveur
+    print(base_url, flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Minimal local HTTP server answering every GET/POST with a small JSON body after a fixed delay.
+
+Used by the benchmarks to measure the cost of API latency without calling the production API.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_stub_server(latency=0.05, port=0):
+    """
+    Starts the stub server in a background thread.
+
+    Args:
+        latency (float): Delay (seconds) applied to every response.
+        port (int): Port to listen on (0 picks a free port).
+
+    Returns:
+        tuple: (server, base_url). Call server.shutdown() to stop it.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _answer(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            time.sleep(latency)
+            body = json.dumps({'data': {}, 'path': self.path}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _answer
+        do_POST = _answer
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
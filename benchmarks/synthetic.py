@@ -0,0 +1,75 @@
+"""
+Synthetic Beyond API payloads for the benchmarks.
+"""
+import datetime
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from B14_timeseries_parser import series_from_points
+from B15_series_table import SeriesTable
+
+
+def make_timestamps(n_points, step_minutes=10, start=datetime.datetime(2024, 1, 1)):
+    """
+    Returns n_points ISO 8601 timestamps spaced by step_minutes.
+    """
+    step = datetime.timedelta(minutes=step_minutes)
+    return [(start + i * step).strftime('%Y-%m-%dT%H:%M:%S.000Z') for i in range(n_points)]
+
+
+def make_points(timestamps, rng=random):
+    """
+    Returns raw timeseries points as sent by timeseriesdata/search.
+    """
+    points = []
+    for t in timestamps:
+        v = rng.uniform(-10, 10)
+        points.append({'v': v, 'rv': v + 1.0, 'dv': v, 't': t, 'p': None, 'e': 0})
+    return points
+
+
+def make_sensor_payload(n_sensors, n_points, datapoints=('DX', 'DY'), step_minutes=10, sensor_type='crack_meters',
+                        raw=False):
+    """
+    Builds (sensor_data, grouped_sensors) in the format produced by B12.extract_data (a SeriesTable).
+
+    With raw=True the data is the former nested dict of raw point dicts
+    ({sensor_type: {sensor_id: [{sensor_id: {'datapointTypes': {code: [point, ...]}}}]}}).
+    """
+    timestamps = make_timestamps(n_points, step_minutes)
+    rng = random.Random(0)
+    sensors = {f"sensor{i:05d}": f"CAPTEUR_{i:05d}" for i in range(n_sensors)}
+    grouped_sensors = [{'type': sensor_type, 'sensors': sensors}]
+
+    if raw:
+        data = {
+            sensor_id: [
+                {sensor_id: {'datapointTypes': {code: make_points(timestamps, rng)}}}
+                for code in datapoints
+            ]
+            for sensor_id in sensors
+        }
+        return {sensor_type: data}, grouped_sensors
+
+    table = SeriesTable()
+    for sensor_id, name in sensors.items():
+        for code in datapoints:
+            table.add(sensor_type, sensor_id, name, code, series_from_points(make_points(timestamps, rng)))
+    return table, grouped_sensors
+
+
+def make_search_body(n_sensors, n_points, datapoints=('DX', 'DY'), step_minutes=10):
+    """
+    Returns a timeseriesdata/search response body (bytes) for n_sensors x datapoints series.
+    """
+    timestamps = make_timestamps(n_points, step_minutes)
+    rng = random.Random(0)
+    data = {
+        f"sensor{i:05d}": {'datapointTypes': {code: make_points(timestamps, rng) for code in datapoints}}
+        for i in range(n_sensors)
+    }
+    return json.dumps({'data': data}).encode()
@@ -1,10 +1,22 @@
 import json
 import os
 
-# Dossier commun pour la config
-CONFIG_DIR = r"C:\Temp\API"
+# Dossier commun pour la config : variable d'environnement BEYOND_API_DIR, sinon C:\Temp\API sous Windows
+# et ~/.beyond_api ailleurs (un chemin Windows créerait un dossier "C:\Temp\API" dans le dossier courant)
+CONFIG_DIR = os.environ.get("BEYOND_API_DIR") or (
+    r"C:\Temp\API" if os.name == "nt" else os.path.join(os.path.expanduser("~"), ".beyond_api")
+)
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 
+# Dossier du cache local des séries temporelles
+CACHE_DIR = os.path.join(CONFIG_DIR, "cache")
+
+# Dossier où sont enregistrés les exports trop volumineux pour le bouton de téléchargement
+EXPORT_DIR = os.path.join(CONFIG_DIR, "exports")
+
+# Dossier du catalogue local (capteurs, assets, données dérivées) de chaque projet
+CATALOG_DIR = os.path.join(CONFIG_DIR, "catalog")
+
 # Flags en mémoire (si tu en as besoin ailleurs)
 project_reuse_flags = {}  # { project_id or "global": True/False }
 
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules de l'application à la racine du dépôt (comme pour benchmarks/)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,122 @@
+import datetime
+
+import pytest
+
+from Z01_time_windows import parse_time, format_time, merge_intervals, missing_intervals, split_time_window
+
+
+def day(n, hour=0):
+    return datetime.datetime(2025, 1, n, hour, tzinfo=datetime.timezone.utc)
+
+
+MS = datetime.timedelta(milliseconds=1)
+
+
+def test_parse_and_format_time():
+    assert parse_time('2025-01-12T08:30:00.000Z') == datetime.datetime(2025, 1, 12, 8, 30, tzinfo=datetime.timezone.utc)
+    # Datetime sans fuseau : considérée en UTC
+    assert parse_time(datetime.datetime(2025, 1, 12)) == datetime.datetime(2025, 1, 12, tzinfo=datetime.timezone.utc)
+    assert format_time(parse_time('2025-01-31T23:59:59.999Z')) == '2025-01-31T23:59:59.999Z'
+    assert format_time('2025-01-12T10:00:00+02:00') == '2025-01-12T08:00:00.000Z'
+
+
+def test_merge_intervals():
+    assert merge_intervals([]) == []
+    # Désordre, chevauchement et inclusion
+    assert merge_intervals([(day(10), day(12)), (day(1), day(5)), (day(4), day(6)), (day(2), day(3))]) == [
+        (day(1), day(6)), (day(10), day(12)),
+    ]
+
+
+def test_merge_intervals_joins_touching_windows():
+    # Fin à x.999 et début suivant à x+1.000 : intervalles contigus
+    assert merge_intervals([(day(1), day(2) - MS), (day(2), day(3))]) == [(day(1), day(3))]
+    assert merge_intervals([(day(1), day(2)), (day(2) + 2 * MS, day(3))]) == [
+        (day(1), day(2)), (day(2) + 2 * MS, day(3)),
+    ]
+
+
+def test_missing_intervals_without_coverage():
+    assert missing_intervals(day(1), day(31), []) == [(day(1), day(31))]
+
+
+def test_missing_intervals_with_holes():
+    covered = [(day(5), day(10)), (day(15), day(20))]
+    assert missing_intervals(day(1), day(31), covered) == [
+        (day(1), day(5)), (day(10), day(15)), (day(20), day(31)),
+    ]
+
+
+def test_missing_intervals_fully_covered():
+    assert missing_intervals(day(5), day(10), [(day(1), day(31))]) == []
+    # Couverture en deux morceaux contigus
+    assert missing_intervals(day(1), day(31), [(day(1), day(15) - MS), (day(15), day(31))]) == []
+
+
+def test_missing_intervals_ignores_coverage_outside_window():
+    covered = [(day(1), day(3)), (day(25), day(31))]
+    assert missing_intervals(day(5), day(20), covered) == [(day(5), day(20))]
+    assert missing_intervals(day(2), day(28), covered) == [(day(3), day(25))]
+
+
+def test_split_time_window_by_month():
+    assert split_time_window('2025-01-15T00:00:00.000Z', '2025-03-10T23:59:59.000Z', 'month') == [
+        ('2025-01-15T00:00:00.000Z', '2025-01-31T23:59:59.999Z'),
+        ('2025-02-01T00:00:00.000Z', '2025-02-28T23:59:59.999Z'),
+        ('2025-03-01T00:00:00.000Z', '2025-03-10T23:59:59.000Z'),
+    ]
+
+
+def test_split_time_window_across_year_end():
+    assert split_time_window('2024-12-20T00:00:00.000Z', '2025-01-05T00:00:00.000Z', 'month') == [
+        ('2024-12-20T00:00:00.000Z', '2024-12-31T23:59:59.999Z'),
+        ('2025-01-01T00:00:00.000Z', '2025-01-05T00:00:00.000Z'),
+    ]
+
+
+def test_split_time_window_by_week_starts_on_monday():
+    # 2025-01-08 est un mercredi
+    assert split_time_window('2025-01-08T12:00:00.000Z', '2025-01-20T00:00:00.000Z', 'week') == [
+        ('2025-01-08T12:00:00.000Z', '2025-01-12T23:59:59.999Z'),
+        ('2025-01-13T00:00:00.000Z', '2025-01-20T00:00:00.000Z'),
+    ]
+
+
+def test_split_time_window_by_duration():
+    assert split_time_window('2025-01-01T00:00:00.000Z', '2025-01-01T10:00:00.000Z', datetime.timedelta(hours=4)) == [
+        ('2025-01-01T00:00:00.000Z', '2025-01-01T03:59:59.999Z'),
+        ('2025-01-01T04:00:00.000Z', '2025-01-01T07:59:59.999Z'),
+        ('2025-01-01T08:00:00.000Z', '2025-01-01T10:00:00.000Z'),
+    ]
+
+
+def test_split_time_window_ending_on_a_boundary():
+    # Pas de dernière fenêtre vide quand la période se termine sur une limite de découpage
+    assert split_time_window('2025-01-15T00:00:00.000Z', '2025-02-01T00:00:00.000Z', 'month') == [
+        ('2025-01-15T00:00:00.000Z', '2025-02-01T00:00:00.000Z'),
+    ]
+    assert split_time_window('2025-01-01T00:00:00.000Z', '2025-01-03T00:00:00.000Z', 'day') == [
+        ('2025-01-01T00:00:00.000Z', '2025-01-01T23:59:59.999Z'),
+        ('2025-01-02T00:00:00.000Z', '2025-01-03T00:00:00.000Z'),
+    ]
+
+
+def test_split_time_window_covers_the_window_without_overlap():
+    windows = split_time_window('2025-01-03T05:00:00.000Z', '2025-04-17T18:30:00.000Z', 'week')
+    assert windows[0][0] == '2025-01-03T05:00:00.000Z'
+    assert windows[-1][1] == '2025-04-17T18:30:00.000Z'
+    for (_, end), (next_start, _) in zip(windows, windows[1:]):
+        assert parse_time(next_start) - parse_time(end) == MS
+    assert all(parse_time(start) <= parse_time(end) for start, end in windows)
+
+
+def test_split_time_window_without_chunk():
+    assert split_time_window('2025-01-01T00:00:00.000Z', '2025-06-01T00:00:00.000Z', None) == [
+        ('2025-01-01T00:00:00.000Z', '2025-06-01T00:00:00.000Z'),
+    ]
+
+
+@pytest.mark.parametrize('chunk', ['year', 'months', datetime.timedelta(0), datetime.timedelta(hours=-1)])
+def test_split_time_window_rejects_invalid_chunks(chunk):
+    with pytest.raises(ValueError):
+        split_time_window('2025-01-01T00:00:00.000Z', '2025-02-01T00:00:00.000Z', chunk)
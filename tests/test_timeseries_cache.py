@@ -0,0 +1,113 @@
+import array
+import datetime
+import math
+
+import pytest
+
+from B00_login import login
+from B12_sensor_informations import extract_data
+from B13_timeseries_cache import TimeseriesCache, STABLE_DELAY, stable_cutoff
+from benchmarks.mock_api import MockConfig, start_mock_api
+
+NOW = datetime.datetime(2025, 3, 10, 11, 19, 9, 253000, tzinfo=datetime.timezone.utc)
+
+
+def series(*points):
+    return {'t': [t for t, _ in points], 'v': array.array('d', [v for _, v in points])}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TimeseriesCache('project', cache_dir=str(tmp_path), now=NOW)
+    yield cache
+    cache.close()
+
+
+def test_stable_cutoff_is_rounded_to_midnight():
+    assert stable_cutoff(NOW) == datetime.datetime(2025, 3, 8, tzinfo=datetime.timezone.utc)
+    assert stable_cutoff(NOW + datetime.timedelta(hours=5)) == stable_cutoff(NOW)
+    assert NOW - stable_cutoff(NOW) >= STABLE_DELAY
+
+
+def test_store_load_round_trip(cache):
+    cache.store('s1', 'D1', 'derived', '2025-01-01T00:00:00.000Z', '2025-01-31T23:59:59.000Z',
+                series(('2025-01-02T00:00:00.000Z', 1.5), ('2025-01-03T00:00:00.000Z', math.nan)))
+
+    loaded = cache.load('s1', 'D1', 'derived', '2025-01-01T00:00:00.000Z', '2025-01-31T23:59:59.000Z')
+    assert loaded['t'] == ['2025-01-02T00:00:00.000Z', '2025-01-03T00:00:00.000Z']
+    assert loaded['v'][0] == 1.5 and math.isnan(loaded['v'][1])
+    assert cache.load('s1', 'D2', 'derived', '2025-01-01T00:00:00.000Z', '2025-01-31T23:59:59.000Z')['t'] == []
+
+
+def test_missing_windows_after_store(cache):
+    cache.store('s1', 'D1', 'derived', '2025-01-10T00:00:00.000Z', '2025-01-20T00:00:00.000Z', series())
+
+    assert cache.missing_windows('s1', 'D1', 'derived', '2025-01-01T00:00:00.000Z', '2025-01-31T00:00:00.000Z') == [
+        ('2025-01-01T00:00:00.000Z', '2025-01-10T00:00:00.000Z'),
+        ('2025-01-20T00:00:00.000Z', '2025-01-31T00:00:00.000Z'),
+    ]
+    assert cache.missing_windows('s1', 'D1', 'derived', '2025-01-12T00:00:00.000Z', '2025-01-18T00:00:00.000Z') == []
+    # Autre type de donnée : rien n'est couvert
+    assert cache.missing_windows('s1', 'D1', 'raw', '2025-01-12T00:00:00.000Z', '2025-01-18T00:00:00.000Z') == [
+        ('2025-01-12T00:00:00.000Z', '2025-01-18T00:00:00.000Z'),
+    ]
+
+
+def test_adjacent_stores_merge_coverage(cache):
+    cache.store('s1', 'D1', 'derived', '2025-01-01T00:00:00.000Z', '2025-01-31T23:59:59.999Z', series())
+    cache.store('s1', 'D1', 'derived', '2025-02-01T00:00:00.000Z', '2025-02-28T23:59:59.999Z', series())
+
+    assert cache.missing_windows('s1', 'D1', 'derived', '2025-01-01T00:00:00.000Z', '2025-02-28T23:59:59.999Z') == []
+    assert len(cache._covered(('s1', 'D1', 'derived'))) == 1
+
+
+def test_recent_data_is_not_marked_covered(cache):
+    cache.store('s1', 'D1', 'derived', '2025-03-01T00:00:00.000Z', '2025-03-10T23:59:59.000Z',
+                series(('2025-03-09T12:00:00.000Z', 2.0)))
+
+    # Points récents stockés, mais fenêtre couverte seulement jusqu'à la limite de stabilité
+    assert cache.missing_windows('s1', 'D1', 'derived', '2025-03-01T00:00:00.000Z', '2025-03-10T23:59:59.000Z') == [
+        ('2025-03-08T00:00:00.000Z', '2025-03-10T23:59:59.000Z'),
+    ]
+    assert cache.load('s1', 'D1', 'derived', '2025-03-09T00:00:00.000Z', '2025-03-10T00:00:00.000Z')['v'][0] == 2.0
+
+
+def test_series_share_missing_window(cache):
+    for sensor_id in ('s1', 's2', 's3'):
+        cache.store(sensor_id, 'D1', 'derived', '2025-03-01T00:00:00.000Z', '2025-03-10T23:59:59.000Z', series())
+
+    windows = {
+        tuple(cache.missing_windows(sensor_id, 'D1', 'derived', '2025-03-01T00:00:00.000Z', '2025-03-10T23:59:59.000Z'))
+        for sensor_id in ('s1', 's2', 's3')
+    }
+    assert len(windows) == 1
+
+
+def test_warm_cache_keeps_series_batched(tmp_path):
+    # Période se terminant maintenant : une partie récente est re-téléchargée à chaque exécution
+    server, base_url = start_mock_api(MockConfig(sensor_types=1, sensors_per_type=10, datapoints=2))
+    try:
+        client = login('user@example.com', 'secret', base_url=base_url, token_url=base_url + '/token')
+        grouped = [{'type': 'Type de capteur 01',
+                    'sensors': {f"{0:04x}{i:020x}": f"CAPTEUR_01_{i + 1:04d}" for i in range(10)}}]
+        selected = [{'sensor_type': 'Type de capteur 01',
+                     'selectedDerivedDatapoints': [{'name': 'D1', 'code': 'D1'}, {'name': 'D2', 'code': 'D2'}]}]
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start_time = (now - datetime.timedelta(days=5)).strftime('%Y-%m-%dT00:00:00.000Z')
+        end_time = now.strftime('%Y-%m-%dT23:59:59.000Z')
+
+        requests_per_run = []
+        for _ in range(2):
+            cache = TimeseriesCache('project', cache_dir=str(tmp_path))
+            before = server.request_count
+            table = extract_data('project', client, grouped, start_time, end_time, selected, cache=cache,
+                                 time_chunk=None)
+            requests_per_run.append(server.request_count - before)
+            cache.close()
+            assert len(table.series) == 20
+
+        # Exécution suivante : seule la fenêtre récente, commune à toutes les séries, est demandée
+        assert requests_per_run[1] <= requests_per_run[0]
+        assert requests_per_run[1] == 1
+    finally:
+        server.shutdown()
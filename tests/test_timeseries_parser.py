@@ -0,0 +1,122 @@
+import io
+import json
+import math
+
+import pytest
+import requests
+import urllib3
+
+import B14_timeseries_parser as parser
+from B14_timeseries_parser import parse_timeseries_response, _from_document, _from_stream
+
+needs_ijson = pytest.mark.skipif(parser.ijson is None, reason="ijson non installé")
+
+DOCUMENT = {
+    'data': {
+        'sensor-1': {
+            'name': 'FISS_2D_R+3_Paris',
+            'datapointTypes': {
+                'DX': [
+                    {'v': 3.47, 'rv': 3.4, 'dv': None, 't': '2025-01-12T00:00:00.000Z', 'p': {'q': [1, 2]}, 'e': 0},
+                    {'v': None, 'rv': None, 'dv': None, 't': '2025-01-12T01:00:00.000Z', 'p': None, 'e': -5},
+                    {'t': '2025-01-12T02:00:00.000Z', 'v': 2},
+                ],
+                'T001': [],
+            },
+        },
+        'sensor-2': {'datapointTypes': {'DX': [{'v': -1.5, 't': '2025-01-12T00:00:00.000Z'}]}},
+    },
+    'meta': {'datapointTypes': {'DX': [{'v': 99, 't': 'ignored'}]}},
+}
+
+
+class FakeRaw:
+    """
+    Body stream of a response; raises error after `cut` bytes when given (connection dropped).
+    """
+
+    def __init__(self, body, cut=None, error=None):
+        self._body = io.BytesIO(body if cut is None else body[:cut])
+        self.error = error
+        self.decode_content = False
+
+    def read(self, size=-1):
+        chunk = self._body.read(size)
+        if not chunk and self.error is not None:
+            raise self.error
+        return chunk
+
+
+class FakeResponse:
+    def __init__(self, body, consumed=False, **raw_kwargs):
+        self.raw = FakeRaw(body, **raw_kwargs)
+        self.content = body
+        self._content_consumed = consumed
+
+
+def as_lists(result):
+    return {
+        entity: {code: (series['t'], [None if math.isnan(v) else v for v in series['v']])
+                 for code, series in codes.items()}
+        for entity, codes in result.items()
+    }
+
+
+EXPECTED = {
+    'sensor-1': {
+        'DX': (['2025-01-12T00:00:00.000Z', '2025-01-12T01:00:00.000Z', '2025-01-12T02:00:00.000Z'], [3.47, None, 2.0]),
+        'T001': ([], []),
+    },
+    'sensor-2': {'DX': (['2025-01-12T00:00:00.000Z'], [-1.5])},
+}
+
+
+def test_from_document():
+    assert as_lists(_from_document(DOCUMENT)) == EXPECTED
+    assert _from_document(None) == {}
+    assert _from_document({'data': None}) == {}
+
+
+@needs_ijson
+def test_from_stream_matches_document_parser():
+    assert as_lists(_from_stream(io.BytesIO(json.dumps(DOCUMENT).encode()))) == EXPECTED
+
+
+@needs_ijson
+def test_from_stream_response_not_keyed_by_entity():
+    document = {'data': {'datapointTypes': {'N_moy': [{'t': '2025-01-12T00:00:00.000Z', 'v': 1.25}]}}}
+    result = _from_stream(io.BytesIO(json.dumps(document).encode()))
+    assert as_lists(result) == {None: {'N_moy': (['2025-01-12T00:00:00.000Z'], [1.25])}}
+    assert as_lists(_from_document(document)) == as_lists(result)
+
+
+@needs_ijson
+def test_from_stream_empty_data():
+    assert _from_stream(io.BytesIO(b'{"data": {}}')) == {}
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_parse_timeseries_response(monkeypatch, stream):
+    if stream and parser.ijson is None:
+        pytest.skip("ijson non installé")
+    if not stream:
+        monkeypatch.setattr(parser, 'ijson', None)
+    response = FakeResponse(json.dumps(DOCUMENT).encode())
+    assert as_lists(parse_timeseries_response(response)) == EXPECTED
+
+
+@needs_ijson
+def test_parse_timeseries_response_invalid_json():
+    with pytest.raises(ValueError):
+        parse_timeseries_response(FakeResponse(b'{"data": {"sensor-1": [}'))
+
+
+@needs_ijson
+@pytest.mark.parametrize('error, expected', [
+    (urllib3.exceptions.ProtocolError('Connection broken'), requests.exceptions.ChunkedEncodingError),
+    (urllib3.exceptions.ReadTimeoutError(None, None, 'Read timed out'), requests.exceptions.ReadTimeout),
+])
+def test_parse_timeseries_response_interrupted_body(error, expected):
+    body = json.dumps(DOCUMENT).encode()
+    with pytest.raises(expected):
+        parse_timeseries_response(FakeResponse(body, cut=len(body) // 2, error=error))